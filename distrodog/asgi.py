@@ -0,0 +1,25 @@
+"""
+ASGI config for distrodog project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the project through this entry point (e.g. ``uvicorn distrodog.asgi:application``)
+so the live order board stream holds an idle coroutine per screen instead of
+a worker thread.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'distrodog.settings')
+
+application = get_asgi_application()
+
+# Serve app static files in development, as runserver does
+if settings.DEBUG:
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+    application = ASGIStaticFilesHandler(application)
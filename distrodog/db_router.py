@@ -0,0 +1,163 @@
+"""
+Primary/replica database routing.
+
+Read-only requests (GET/HEAD/OPTIONS) read from a healthy replica, the same
+one for all of the request's queries; everything else, including management commands and background work, uses the primary.
+After a user writes, their session is pinned to the primary for
+REPLICA_PIN_SECONDS so they read their own writes, and replicas lagging more
+than REPLICA_MAX_LAG_SECONDS are skipped until they catch up.
+"""
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Apps whose rows are read right after being written (e.g. the session
+# created at login), so they always use the primary
+PRIMARY_ONLY_APPS = {'sessions'}
+
+SESSION_PIN_KEY = '_db_pinned_until'
+
+# Primary unless the current request was explicitly marked read-only
+_read_from_replica = contextvars.ContextVar('read_from_replica', default=False)
+# Replica a read-only request reads from, picked on its first read so all of
+# the request's queries (e.g. an ETag lookup and the page it validates) see
+# the same snapshot
+_request_replica = contextvars.ContextVar('request_replica', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def replica_lag(alias):
+    """Replication lag of a replica in seconds (cached briefly); None if unreachable."""
+    key = f'db:replica_lag:{alias}'
+    lag = cache.get(key)
+    if lag is not None:
+        return None if lag < 0 else lag
+
+    try:
+        lag = _measure_lag(alias)
+    except DatabaseError:
+        logger.warning('Replica %s is unreachable, reading from primary', alias, exc_info=True)
+        lag = -1
+    cache.set(key, lag, getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5))
+    return None if lag < 0 else lag
+
+
+def _measure_lag(alias):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        # A replica that has replayed everything it received is caught up,
+        # even if the last replayed transaction is old (idle primary)
+        cursor.execute("""
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            END
+        """)
+        return float(cursor.fetchone()[0])
+
+
+def healthy_replicas():
+    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+    healthy = []
+    for alias in replica_aliases():
+        lag = replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            healthy.append(alias)
+    return healthy
+
+
+def request_read_alias():
+    """Database this request's reads go to."""
+    if not _read_from_replica.get():
+        return PRIMARY
+    chosen = _request_replica.get()
+    if chosen is None:
+        chosen = {}
+    if 'alias' not in chosen:
+        replicas = healthy_replicas()
+        chosen['alias'] = random.choice(replicas) if replicas else PRIMARY
+    return chosen['alias']
+
+
+def read_staleness():
+    """
+    Upper bound, in seconds, on how far behind the primary this request's reads may be.
+
+    Lag is only measured every REPLICA_LAG_CHECK_INTERVAL seconds, so the
+    interval is added to the replica's last measured lag.
+    """
+    alias = request_read_alias()
+    if alias == PRIMARY:
+        return 0
+    lag = replica_lag(alias)
+    if lag is None:
+        return float('inf')
+    return lag + getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 5)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to replicas only for requests marked read-only by the middleware."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        return request_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Mark safe requests as replica-readable and pin sessions after writes.
+
+    Must come after SessionMiddleware so the pin is saved with the session.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        read_only = request.method in SAFE_METHODS and not self.is_pinned(request)
+        token = _read_from_replica.set(read_only)
+        replica_token = _request_replica.set({})
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_replica.reset(replica_token)
+            _read_from_replica.reset(token)
+
+        # Rejected requests (e.g. 429 from admission control) wrote nothing,
+        # so they don't pin the session or cost a session save
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            request.session[SESSION_PIN_KEY] = time.time() + getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        return response
+
+    @staticmethod
+    def is_pinned(request):
+        pinned_until = request.session.get(SESSION_PIN_KEY)
+        return pinned_until is not None and pinned_until > time.time()
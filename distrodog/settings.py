@@ -23,6 +23,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'distrodog.db_router.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -43,7 +44,35 @@ TEMPLATES = [{
     ]},
 }]
 
+# Compile templates once per process in production
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Cache for rendered order fragments. The default local-memory cache is per
+# process; multi-process deployments should point this at a shared backend,
+# e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://redis:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'distrodog'),
+    }
+}
+
+# Seconds a rendered order fragment stays cached. Row fragments are keyed on
+# Order.updated_at and can live long; page fragments are keyed on the orders
+# version counter and are kept short in case the cache is not shared.
+ORDER_ROW_CACHE_TIMEOUT = int(os.getenv('ORDER_ROW_CACHE_TIMEOUT', '3600'))
+ORDER_PAGE_CACHE_TIMEOUT = int(os.getenv('ORDER_PAGE_CACHE_TIMEOUT', '60'))
+
 WSGI_APPLICATION = 'distrodog.wsgi.application'
+ASGI_APPLICATION = 'distrodog.asgi.application'
 
 DATABASES = {
     'default': {
@@ -56,6 +85,26 @@ DATABASES = {
     }
 }
 
+# Read replicas: comma-separated host[:port] list sharing the primary's
+# database name and credentials, e.g. DB_REPLICA_HOSTS=replica1,replica2:5433
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['distrodog.db_router.PrimaryReplicaRouter']
+
+# Seconds a user's session reads from the primary after they write
+REPLICA_PIN_SECONDS = float(os.getenv('REPLICA_PIN_SECONDS', '5'))
+# Replicas lagging more than this are skipped until they catch up
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+# How long a replica lag measurement is reused
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -73,4 +122,27 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media is served by a permission-checked view (orders.views.order_image).
+# Set MEDIA_ACCEL_MODE=nginx (X-Accel-Redirect to MEDIA_ACCEL_PREFIX, an
+# internal location aliased to MEDIA_ROOT) or sendfile (X-Sendfile) to let
+# the front server send the bytes; empty serves files from Django.
+MEDIA_ACCEL_MODE = os.getenv('MEDIA_ACCEL_MODE', '')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_SECONDS = int(os.getenv('MEDIA_CACHE_SECONDS', '3600'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Offline scan sync: largest batch a station may upload in one request
+SCAN_SYNC_MAX_EVENTS = int(os.getenv('SCAN_SYNC_MAX_EVENTS', '10000'))
+DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('DATA_UPLOAD_MAX_MEMORY_SIZE', str(10 * 1024 * 1024)))
+
+# Admission control for scan and order writes (see orders/admission.py):
+# token buckets per station (scoped to the user) and per user, global
+# in-flight write limit and window for ignoring repeated identical scans;
+# 0 disables a check
+ADMISSION_RATE = float(os.getenv('ADMISSION_RATE', '5'))
+ADMISSION_BURST = int(os.getenv('ADMISSION_BURST', '20'))
+ADMISSION_USER_RATE = float(os.getenv('ADMISSION_USER_RATE', '10'))
+ADMISSION_USER_BURST = int(os.getenv('ADMISSION_USER_BURST', '40'))
+ADMISSION_MAX_CONCURRENT_WRITES = int(os.getenv('ADMISSION_MAX_CONCURRENT_WRITES', '32'))
+SCAN_DEDUPE_SECONDS = float(os.getenv('SCAN_DEDUPE_SECONDS', '2'))
@@ -2,15 +2,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from orders.views import order_image
 
 # Main URL routing for the distrodog project
 urlpatterns = [
     # Django admin interface
     path('admin/', admin.site.urls),
         path('pos/', include('orders.urls')),
+    # Order images are permission-checked in every environment
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", order_image, name='order_image'),
 ]
 
-# Serve media files in development
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
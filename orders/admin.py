@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Product, Order, ImageAttachment, ScanL, InventoryBatch, InventorySample, InventoryScanLog
+from django.utils import timezone
+from .audit import recent_detail_values
+from .events import publish_order_event
+from .models import Product, Order, ImageAttachment, ScanLog, InventoryBatch, InventorySample, InventoryScanLog, Job
 
 
 @admin.register(Product)
@@ -45,6 +48,10 @@ class OrderAdmin(admin.ModelAdmin):
         if not change:
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+        if not change:
+            publish_order_event(obj, 'created')
+        elif 'status' in form.changed_data:
+            publish_order_event(obj, 'status_changed', form.initial.get('status'))
 
 
 class ImageAttachmentInline(admin.TabularInline):
@@ -62,10 +69,60 @@ class ImageAttachmentAdmin(admin.ModelAdmin):
     readonly_fields = ['uploaded_at', 'uploaded_by']
 
 
+class NewStatusFilter(admin.SimpleListFilter):
+    """Filter status changes by details['new_status'] (expression-indexed)."""
+    title = 'new status'
+    parameter_name = 'new_status'
+
+    def lookups(self, request, model_admin):
+        return Order.STATUS_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(details__new_status=self.value())
+        return queryset
+
+
+class DetailsKeyFilter(admin.SimpleListFilter):
+    """Filter audit logs by a details key, with choices from recent entries."""
+    details_key = None
+    time_field = None
+
+    def lookups(self, request, model_admin):
+        values = recent_detail_values(model_admin.model, self.details_key, self.time_field)
+        return [(value, value) for value in values]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f'details__{self.details_key}': self.value()})
+        return queryset
+
+
+class LocationFilter(DetailsKeyFilter):
+    title = 'location'
+    parameter_name = 'location'
+    details_key = 'location'
+    time_field = 'timestamp'
+
+
+class ConditionFilter(DetailsKeyFilter):
+    title = 'condition'
+    parameter_name = 'condition'
+    details_key = 'condition'
+    time_field = 'timestamp'
+
+    def queryset(self, request, queryset):
+        # Containment rather than key equality so the GIN index on details is used
+        if self.value():
+            return queryset.filter(details__contains={'condition': self.value()})
+        return queryset
+
+
 @admin.register(ScanLog)
 class ScanLogAdmin(admin.ModelAdmin):
     list_display = ['id', 'order', 'barcode_data', 'action', 'scanned_by', 'scanned_at']
-    list_filter = ['action', 'scanned_at', 'order']
+    list_filter = ['action', NewStatusFilter, 'scanned_at', 'order']
+    list_select_related = ['order', 'scanned_by']
     search_fields = ['barcode_data', 'order__customer', 'order__barcode']
     readonly_fields = ['scanned_at', 'order', 'barcode_data', 'action']
     date_hierarchy = 'scanned_at'
@@ -81,3 +138,44 @@ class ScanLogAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         # Scan logs should not be deletable for audit purposes
         return False
+
+
+@admin.register(InventoryScanLog)
+class InventoryScanLogAdmin(admin.ModelAdmin):
+    list_display = ['id', 'sample', 'action', 'scanned_by', 'timestamp', 'details']
+    list_filter = ['action', LocationFilter, ConditionFilter, 'timestamp']
+    list_select_related = ['sample__batch__product', 'scanned_by']
+    search_fields = ['sample__barcode']
+    readonly_fields = ['sample', 'action', 'scanned_by', 'details', 'timestamp', 'station']
+    date_hierarchy = 'timestamp'
+
+    def has_add_permission(self, request):
+        # Inventory scan logs are created automatically, not manually
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        # Inventory scan logs should not be editable for audit purposes
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        # Inventory scan logs should not be deletable for audit purposes
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'queue', 'priority', 'status', 'attempts', 'run_at', 'duration_ms', 'finished_at']
+    list_filter = ['status', 'queue', 'name']
+    search_fields = ['name', 'locked_by']
+    readonly_fields = [
+        'name', 'args', 'kwargs', 'attempts', 'last_error', 'result', 'enqueued_by', 'locked_by',
+        'locked_at', 'created_at', 'started_at', 'finished_at', 'duration_ms',
+    ]
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected jobs now')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(
+            status='queued', run_at=timezone.now(), attempts=0, locked_by=None, locked_at=None,
+        )
+        self.message_user(request, f'{updated} jobs queued for retry')
@@ -0,0 +1,230 @@
+"""
+Admission control for the scan and order write endpoints.
+
+Every POST to a view wrapped in ``admission_control`` passes three checks
+before the view (and the database) is touched:
+
+* token buckets per station and per user: ADMISSION_RATE requests per
+  second up to ADMISSION_BURST for each of a user's stations (X-Station-ID
+  header or ``station`` form field), and ADMISSION_USER_RATE /
+  ADMISSION_USER_BURST across all of them.  Stations are client-declared,
+  so they are always scoped to the user: a client can neither drain another
+  user's station nor escape its own limit by rotating station ids;
+* a global limit of ADMISSION_MAX_CONCURRENT_WRITES requests in flight;
+* optionally, identical scans from the same station within
+  SCAN_DEDUPE_SECONDS are answered from the first scan's result.
+
+Setting a rate, limit or window to 0 disables that check.
+
+Rejected requests get an immediate 429 with Retry-After and are counted per
+station for ``admission_metrics``.  All state lives in the shared cache
+(see CACHES in settings) so limits hold across server processes.  Buckets
+use the cache's atomic incr/decr and write slots its atomic add, so the
+limits are exact on Redis and memcached and approximate only in the rare
+races noted below.
+"""
+import hashlib
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import redirect
+
+STATIONS_KEY = 'admission:stations'
+WRITE_SLOT_KEY = 'admission:write_slot:{}'
+REJECTION_REASONS = ['rate_limited', 'overloaded', 'duplicate']
+
+# Bucket keys only need to outlive a full refill; an expired bucket is full
+BUCKET_TTL = 60 * 60
+# Frees a write slot whose process died mid-request
+WRITE_SLOT_TTL = 5 * 60
+# Stands in for a slot when the concurrency limit is disabled
+UNLIMITED = ('', '')
+MAX_TRACKED_STATIONS = 1000
+
+
+def get_station(request):
+    """Station the request declares (header or form field), or None."""
+    station = request.headers.get('X-Station-ID') or request.POST.get('station')
+    if station and station.strip():
+        return station.strip()[:100]
+    return None
+
+
+def station_label(request, station):
+    """Name a user's station is reported under in the metrics."""
+    return f'{request.user.username}@{station}' if station else request.user.username
+
+
+def _hashed(value):
+    # Station ids and barcodes are client input; keep cache keys safe for memcached
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def take_token(bucket, rate, burst):
+    """
+    Take a token from the named bucket; returns seconds to wait, 0 if admitted.
+
+    GCRA form of a token bucket: the cache holds the bucket's "theoretical
+    arrival time" in milliseconds, and each request atomically pushes it one
+    interval further.  A request is admitted while that time is at most
+    ``burst`` intervals ahead of now.
+    """
+    if not rate:
+        return 0
+    interval = max(1, int(1000 / rate))
+    now = int(time.time() * 1000)
+    key = f'admission:bucket:{_hashed(bucket)}'
+
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        tat = None
+    if tat is None or tat - interval < now:
+        # New or idle bucket: it is full again.  Two requests racing here can
+        # both reset it, which only ever admits one extra request
+        cache.set(key, now + interval, BUCKET_TTL)
+        return 0
+    if tat - now > burst * interval:
+        cache.decr(key, interval)
+        return (tat - interval - now - (burst - 1) * interval) / 1000
+    return 0
+
+
+def _write_slot_keys():
+    return [WRITE_SLOT_KEY.format(n) for n in range(settings.ADMISSION_MAX_CONCURRENT_WRITES)]
+
+
+def acquire_write_slot():
+    """
+    Reserve one of the global in-flight write slots; returns it, or None if all are taken.
+
+    Each slot is its own cache key, taken with an atomic add and expiring
+    after WRITE_SLOT_TTL, so a release that never happens frees one slot
+    later instead of skewing a shared count.
+    """
+    if not settings.ADMISSION_MAX_CONCURRENT_WRITES:
+        return UNLIMITED
+    keys = _write_slot_keys()
+    taken = cache.get_many(keys)
+    free = [key for key in keys if key not in taken]
+    # Spread requests over the free slots so concurrent ones rarely collide
+    random.shuffle(free)
+    token = uuid.uuid4().hex
+    for key in free:
+        if cache.add(key, token, WRITE_SLOT_TTL):
+            return key, token
+    return None
+
+
+def release_write_slot(slot):
+    key, token = slot
+    # Only free the slot if it is still ours: after WRITE_SLOT_TTL it may
+    # have expired and been taken by another request.  Racing that handover
+    # between get and delete can at worst admit one extra write
+    if key and cache.get(key) == token:
+        cache.delete(key)
+
+
+def record_rejection(station, reason):
+    key = f'admission:rejected:{_hashed(station)}:{reason}'
+    if cache.add(key, 1, None):
+        stations = cache.get(STATIONS_KEY, [])
+        if station not in stations and len(stations) < MAX_TRACKED_STATIONS:
+            # Read-modify-write: a station first seen by two processes at
+            # once may be missed from the list, not from the counts
+            cache.set(STATIONS_KEY, stations + [station], None)
+    else:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+def admission_metrics():
+    """Rejections per station and reason, plus current write concurrency."""
+    stations = cache.get(STATIONS_KEY, [])
+    keys = {
+        f'admission:rejected:{_hashed(station)}:{reason}': (station, reason)
+        for station in stations
+        for reason in REJECTION_REASONS
+    }
+    counts = {station: dict.fromkeys(REJECTION_REASONS, 0) for station in stations}
+    for key, value in cache.get_many(list(keys)).items():
+        station, reason = keys[key]
+        counts[station][reason] = value
+
+    return {
+        'stations': counts,
+        'writes_in_flight': len(cache.get_many(_write_slot_keys())),
+        'limits': {
+            'station_rate_per_second': settings.ADMISSION_RATE,
+            'station_burst': settings.ADMISSION_BURST,
+            'user_rate_per_second': settings.ADMISSION_USER_RATE,
+            'user_burst': settings.ADMISSION_USER_BURST,
+            'max_concurrent_writes': settings.ADMISSION_MAX_CONCURRENT_WRITES,
+            'scan_dedupe_seconds': settings.SCAN_DEDUPE_SECONDS,
+        },
+    }
+
+
+def _too_many_requests(message, retry_after):
+    response = JsonResponse({'error': message}, status=429)
+    response['Retry-After'] = max(1, math.ceil(retry_after))
+    return response
+
+
+def admission_control(dedupe_field=None):
+    """
+    Rate limit, concurrency limit and (optionally) deduplicate POSTs to a view.
+
+    With ``dedupe_field``, a POST repeating the same value of that field from
+    the same station within SCAN_DEDUPE_SECONDS is answered with the first
+    request's redirect without running the view again.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            user_id = request.user.id
+            station = get_station(request)
+            label = station_label(request, station)
+
+            dedupe_key = None
+            if dedupe_field and settings.SCAN_DEDUPE_SECONDS:
+                value = (request.POST.get(dedupe_field) or '').strip()
+                dedupe_key = 'admission:dedupe:' + _hashed(f'{request.path}|{user_id}|{station}|{value}')
+                location = cache.get(dedupe_key)
+                if location:
+                    record_rejection(label, 'duplicate')
+                    return redirect(location)
+
+            wait = (
+                take_token(f'station:{user_id}:{station or ""}', settings.ADMISSION_RATE, settings.ADMISSION_BURST)
+                or take_token(f'user:{user_id}', settings.ADMISSION_USER_RATE, settings.ADMISSION_USER_BURST)
+            )
+            if wait:
+                record_rejection(label, 'rate_limited')
+                return _too_many_requests('Too many requests from this station, slow down', wait)
+
+            slot = acquire_write_slot()
+            if slot is None:
+                record_rejection(label, 'overloaded')
+                return _too_many_requests('Server busy, please retry', 1)
+            try:
+                response = view_func(request, *args, **kwargs)
+            finally:
+                release_write_slot(slot)
+
+            if dedupe_key and response.status_code == 302:
+                cache.set(dedupe_key, response['Location'], settings.SCAN_DEDUPE_SECONDS)
+            return response
+        return wrapper
+    return decorator
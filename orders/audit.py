@@ -0,0 +1,152 @@
+"""
+Structured queries over ScanLog and InventoryScanLog details.
+
+The hot keys have dedicated expression indexes (``details -> 'new_status'``
+on ScanLog, ``details -> 'location'`` on InventoryScanLog, each paired with
+the log time), and any other key is matched with JSON containment, which is
+served by the GIN index on ``details``.  Keep lookups in the forms used here
+(``details__<key>=value`` and ``details__contains``) so PostgreSQL can use
+those indexes.
+"""
+import base64
+import binascii
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ScanLog, InventoryScanLog
+
+MAX_RESULTS = 500
+
+
+class AuditQueryError(ValueError):
+    """Raised for invalid audit query parameters."""
+
+
+def parse_bound(value, end=False):
+    """Parse a date or datetime query bound; a plain date covers the whole day."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise AuditQueryError(f'Invalid date {value!r}')
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def encode_cursor(text):
+    """Opaque, URL-safe form of a paging cursor (ISO times contain ``+``)."""
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    try:
+        return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise AuditQueryError('Invalid cursor')
+
+
+def parse_cursor(value):
+    """Decode a paging cursor (encoded ``<iso time>|<id>``) into (time, id)."""
+    if not value:
+        return None
+    moment, _, pk = decode_cursor(value).rpartition('|')
+    moment = parse_datetime(moment)
+    if moment is None or not pk.isdigit():
+        raise AuditQueryError('Invalid cursor')
+    return moment, int(pk)
+
+
+def make_cursor(moment, pk):
+    return encode_cursor(f'{moment.isoformat()}|{pk}')
+
+
+def _apply_common(queryset, time_field, action=None, since=None, until=None, details=None, before=None):
+    if action:
+        queryset = queryset.filter(action=action)
+    if since:
+        queryset = queryset.filter(**{f'{time_field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{time_field}__lt': until})
+    if details:
+        queryset = queryset.filter(details__contains=details)
+    if before:
+        # Keyset paging on (time, id) so deep pages stay index range scans
+        moment, pk = before
+        queryset = queryset.filter(Q(**{f'{time_field}__lt': moment}) | Q(**{time_field: moment, 'id__lt': pk}))
+    return queryset.order_by(f'-{time_field}', '-id')
+
+
+def search_scan_logs(*, new_status=None, action=None, since=None, until=None, details=None,
+                     order_barcode=None, before=None):
+    """ScanLog entries matching the given audit criteria, newest first."""
+    queryset = ScanLog.objects.select_related('order', 'scanned_by')
+    if new_status:
+        queryset = queryset.filter(details__new_status=new_status)
+    if order_barcode:
+        # Through the unique Order.barcode to the (order, scanned_at) index;
+        # barcode_data itself is not indexed
+        queryset = queryset.filter(order__barcode=order_barcode)
+    return _apply_common(queryset, 'scanned_at', action, since, until, details, before)
+
+
+def search_inventory_logs(*, location=None, condition=None, action=None, since=None, until=None,
+                          details=None, sample_barcode=None, before=None):
+    """InventoryScanLog entries matching the given audit criteria, newest first."""
+    queryset = InventoryScanLog.objects.select_related('sample', 'scanned_by')
+    if location:
+        queryset = queryset.filter(details__location=location)
+    if condition:
+        details = {**(details or {}), 'condition': condition}
+    if sample_barcode:
+        queryset = queryset.filter(sample__barcode=sample_barcode)
+    return _apply_common(queryset, 'timestamp', action, since, until, details, before)
+
+
+def recent_detail_values(model, key, time_field, sample_size=10000):
+    """
+    Distinct values of a details key among the most recent log entries.
+
+    Used for admin filter choices: a DISTINCT over the whole audit table
+    would scan every row, so only the latest ``sample_size`` entries are
+    looked at.
+    """
+    recent = model.objects.order_by(f'-{time_field}').values_list('id', flat=True)[:sample_size]
+    values = (
+        model.objects.filter(id__in=recent, **{f'details__{key}__isnull': False})
+        .values_list(f'details__{key}', flat=True)
+        .distinct()
+    )
+    return sorted({str(value) for value in values if value is not None})
+
+
+def serialize_scan_log(log):
+    return {
+        'id': log.id,
+        'order_id': log.order_id,
+        'barcode': log.barcode_data,
+        'action': log.action,
+        'scanned_by': log.scanned_by.username if log.scanned_by else None,
+        'scanned_at': log.scanned_at.isoformat(),
+        'station': log.station,
+        'details': log.details,
+    }
+
+
+def serialize_inventory_log(log):
+    return {
+        'id': log.id,
+        'sample_id': log.sample_id,
+        'barcode': log.sample.barcode,
+        'action': log.action,
+        'scanned_by': log.scanned_by.username if log.scanned_by else None,
+        'timestamp': log.timestamp.isoformat(),
+        'station': log.station,
+        'details': log.details,
+    }
@@ -0,0 +1,75 @@
+"""
+Cache helpers for order pages.
+
+Rendered fragments are keyed on ``Order.updated_at`` (rows) or on a global
+orders version counter (whole pages).  The counter is bumped whenever an
+order, product or image attachment changes, which invalidates every page
+fragment at once without having to know which keys exist.  The counter must
+live in a cache shared by all server processes (see CACHES in settings).
+
+The time of the last bump is kept next to the counter: a request reading
+from a replica that may not have replayed that write yet must not fill or
+validate anything under the new version (see ``version_is_settled``).
+"""
+import time
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from distrodog.db_router import read_staleness
+
+ORDERS_VERSION_KEY = 'orders:version'
+ORDERS_VERSION_BUMPED_AT_KEY = 'orders:version:bumped_at'
+
+
+def get_orders_version():
+    """Current orders version, used as part of page fragment cache keys."""
+    version = cache.get(ORDERS_VERSION_KEY)
+    if version is None:
+        _reset_version()
+        version = cache.get(ORDERS_VERSION_KEY, 0)
+    return version
+
+
+def _reset_version():
+    # Seed from the clock so a restarted or evicted counter never reuses a
+    # version that still has fragments cached under it
+    # Writes may have been lost with the old counter, so this counts as a bump
+    cache.set(ORDERS_VERSION_BUMPED_AT_KEY, time.time(), timeout=None)
+    cache.add(ORDERS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def bump_orders_version():
+    """Invalidate all page fragments that depend on order data."""
+    # Stamped first: a reader that sees the new version must see its time
+    cache.set(ORDERS_VERSION_BUMPED_AT_KEY, time.time(), timeout=None)
+    try:
+        return cache.incr(ORDERS_VERSION_KEY)
+    except ValueError:
+        # Key missing or evicted: start a fresh sequence
+        _reset_version()
+        return cache.incr(ORDERS_VERSION_KEY)
+
+
+def version_is_settled():
+    """
+    Whether this request's reads already include the last versioned write.
+
+    Always true on the primary.  On a replica, only once the last bump is
+    older than the replica may lag; until then pages are rendered but not
+    cached or given a version-based ETag.
+    """
+    bumped_at = cache.get(ORDERS_VERSION_BUMPED_AT_KEY)
+    return bumped_at is None or time.time() - bumped_at > read_staleness()
+
+
+def version_is_shared():
+    """
+    Whether every server process sees the same version counter.
+
+    With a per-process (LocMemCache) or no-op (DummyCache) backend, a process
+    that didn't handle a write never sees the bump, so anything keyed on the
+    version alone must also expire on its own.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
@@ -0,0 +1,136 @@
+"""
+Order change events for the live order board.
+
+Views publish an event when an order is created or its status changes.  On
+PostgreSQL the event is sent with NOTIFY after the transaction commits; each
+server process runs a single LISTEN connection and fans the event out to all
+board clients connected to that process.  Hundreds of wall screens therefore
+cost one notification per change instead of a dashboard query burst per
+refresh.  On other databases (development) events are delivered in-process.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'order_events'
+
+# Per-client backlog; a client that falls this far behind is told to resync
+QUEUE_SIZE = 100
+
+
+def order_event_payload(order, kind, old_status=None):
+    """Serialize the fields the board needs to patch a single row."""
+    return {
+        'kind': kind,
+        'id': order.id,
+        'customer': order.customer,
+        'product': order.product.name,
+        'quantity': order.quantity,
+        'status': order.status,
+        'status_display': order.get_status_display(),
+        'old_status': old_status,
+        'barcode': order.barcode,
+        'created_by_id': order.created_by_id,
+        'created_by': order.created_by.username,
+        'created_at': order.created_at.isoformat(),
+    }
+
+
+def publish_order_event(order, kind, old_status=None):
+    """Publish an order change once the surrounding transaction commits."""
+    payload = json.dumps(order_event_payload(order, kind, old_status))
+    transaction.on_commit(lambda: _notify(payload))
+
+
+def _notify(payload):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+    else:
+        broadcaster.dispatch(json.loads(payload))
+
+
+class Broadcaster:
+    """Fans order events out to the board clients of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._listener = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+            self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not queue}
+
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Event loop already closed; the stream's cleanup will unsubscribe
+                pass
+
+    @staticmethod
+    def _deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop the backlog and ask for a full reload
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({'kind': 'resync'})
+
+    def _ensure_listener(self):
+        if self._listener is not None or connection.vendor != 'postgresql':
+            return
+        self._listener = threading.Thread(target=self._listen, name='order-events-listener', daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        db = settings.DATABASES['default']
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(
+                    dbname=db['NAME'], user=db['USER'], password=db['PASSWORD'],
+                    host=db['HOST'], port=db['PORT'],
+                )
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL};')
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self.dispatch(json.loads(notify.payload))
+            except Exception:
+                logger.exception('Order event listener failed, reconnecting')
+                time.sleep(5)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,211 @@
+"""
+Database-backed background jobs.
+
+Tasks are plain functions registered with ``@task``; ``enqueue`` (or
+``my_task.delay(...)``) stores a Job row, and ``manage.py run_workers`` claims
+due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of worker
+processes can share the table without handing the same job out twice.
+Failed jobs are retried with exponential backoff until ``max_attempts``.
+
+Jobs are enqueued inside the caller's transaction, so a job never runs for
+data that was rolled back.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+from time import perf_counter
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = 'default'
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Retry delay: BACKOFF_BASE * 2 ** (attempt - 1) seconds, capped, plus jitter
+BACKOFF_BASE = 5
+BACKOFF_MAX = 60 * 60
+
+_tasks = {}
+
+
+class UnknownTask(LookupError):
+    """Raised when a job names a task that is not registered."""
+
+
+def task(name=None, queue=DEFAULT_QUEUE, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Register a function as a background task and give it a ``delay()`` helper.
+
+    ``delay()`` accepts the same options as ``enqueue`` (``delay``,
+    ``enqueued_by``), so task keyword arguments must not reuse those names.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _tasks[task_name] = func
+        func.task_name = task_name
+
+        def delay(*args, **kwargs):
+            return enqueue(
+                task_name, *args,
+                queue=queue, priority=priority, max_attempts=max_attempts, **kwargs
+            )
+
+        func.delay = delay
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _tasks[name]
+    except KeyError:
+        raise UnknownTask(f'No task registered as {name!r}')
+
+
+def enqueue(name, *args, queue=DEFAULT_QUEUE, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS,
+            delay=None, enqueued_by=None, **kwargs):
+    """Store a job for the named task; arguments must be JSON-serializable."""
+    get_task(name)
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        queue=queue,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta(0)),
+        enqueued_by=enqueued_by,
+    )
+
+
+def claim_jobs(worker_id, queues=(DEFAULT_QUEUE,), limit=1):
+    """
+    Atomically claim up to ``limit`` due jobs for this worker.
+
+    Rows locked by another worker's claim are skipped rather than waited on,
+    so concurrent workers never block each other or double-run a job.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', queue__in=queues, run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')[:limit]
+        )
+        for job in jobs:
+            job.status = 'running'
+            job.locked_by = worker_id
+            job.locked_at = now
+            job.started_at = now
+            job.attempts += 1
+        Job.objects.bulk_update(jobs, ['status', 'locked_by', 'locked_at', 'started_at', 'attempts'])
+    return jobs
+
+
+def backoff_delay(attempts):
+    delay = min(BACKOFF_BASE * 2 ** max(0, attempts - 1), BACKOFF_MAX)
+    return timedelta(seconds=delay + random.uniform(0, delay / 10))
+
+
+def run_job(job):
+    """Execute a claimed job and record its outcome, scheduling a retry on failure."""
+    start = perf_counter()
+    try:
+        result = get_task(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        job.duration_ms = (perf_counter() - start) * 1000
+        job.finished_at = timezone.now()
+        job.last_error = traceback.format_exc()
+        job.locked_by = None
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            logger.error('Job %s (%s) failed permanently after %s attempts', job.id, job.name, job.attempts)
+        else:
+            job.status = 'queued'
+            job.run_at = timezone.now() + backoff_delay(job.attempts)
+            logger.warning('Job %s (%s) failed, retrying at %s', job.id, job.name, job.run_at)
+        job.save(update_fields=[
+            'status', 'run_at', 'last_error', 'duration_ms', 'finished_at', 'locked_by', 'locked_at',
+        ])
+        return False
+
+    job.duration_ms = (perf_counter() - start) * 1000
+    job.finished_at = timezone.now()
+    job.status = 'succeeded'
+    job.result = result
+    job.locked_by = None
+    job.locked_at = None
+    job.save(update_fields=['status', 'result', 'duration_ms', 'finished_at', 'locked_by', 'locked_at'])
+    return True
+
+
+def requeue_stale_jobs(timeout):
+    """
+    Recover jobs whose worker died mid-run (no heartbeat for ``timeout``).
+
+    The lost run counts as a failed attempt: the job is retried with backoff,
+    or marked failed once it has used ``max_attempts``, so a job that kills
+    its worker (e.g. out of memory) isn't rerun forever.  Returns
+    (requeued, failed) counts.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status='running', locked_at__lt=now - timeout)
+        )
+        failed = 0
+        for job in jobs:
+            job.locked_by = None
+            job.locked_at = None
+            job.finished_at = now
+            job.last_error = f'Worker stopped responding (no heartbeat for {timeout.total_seconds():.0f}s)'
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                failed += 1
+                logger.error('Job %s (%s) failed permanently: worker lost on attempt %s', job.id, job.name, job.attempts)
+            else:
+                job.status = 'queued'
+                job.run_at = now + backoff_delay(job.attempts)
+        Job.objects.bulk_update(jobs, ['status', 'run_at', 'locked_by', 'locked_at', 'finished_at', 'last_error'])
+    return len(jobs) - failed, failed
+
+
+def job_metrics():
+    """Per-task counts, retries, run time and queue latency."""
+    metrics = {}
+    rows = Job.objects.values('name', 'status').annotate(
+        count=Count('id'),
+        attempts=Sum('attempts'),
+        avg_duration_ms=Avg('duration_ms'),
+        max_duration_ms=Max('duration_ms'),
+    )
+    for row in rows:
+        entry = metrics.setdefault(row['name'], {
+            'by_status': {}, 'attempts': 0, 'avg_duration_ms': None, 'max_duration_ms': None,
+        })
+        entry['by_status'][row['status']] = row['count']
+        entry['attempts'] += row['attempts'] or 0
+        if row['status'] == 'succeeded':
+            entry['avg_duration_ms'] = row['avg_duration_ms']
+            entry['max_duration_ms'] = row['max_duration_ms']
+
+    # Due jobs per queue and how long the oldest has been waiting
+    now = timezone.now()
+    backlog = {}
+    for row in Job.objects.filter(status='queued', run_at__lte=now).values('queue').annotate(
+        due=Count('id'), oldest=Min('run_at')
+    ):
+        backlog[row['queue']] = {
+            'due': row['due'],
+            'oldest_wait_seconds': (now - row['oldest']).total_seconds(),
+        }
+
+    return {'tasks': metrics, 'backlog': backlog}
@@ -0,0 +1,244 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User, Group
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+from orders.models import (
+    Product, Order, ScanLog, InventoryBatch, InventorySample, InventoryScanLog,
+)
+
+# All synthetic rows are tagged with this prefix so they can be flushed again
+PREFIX = 'BENCH'
+
+# Scale name -> number of orders; every other table is sized relative to it
+SCALES = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+# Benchmark users, one per role (see setup_groups)
+BENCH_USERS = {
+    'admin': 'administrators',
+    'manager': 'managers',
+    'operator': 'operators',
+    'warehouse_staff': 'warehouse_staff',
+}
+
+CHUNK_SIZE = 5000
+
+
+def bench_username(role):
+    return f'bench_{role}'
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic products, orders, batches, samples and audit logs for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='10k', help=f"One of {', '.join(SCALES)} or a plain order count")
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+        parser.add_argument('--scans-per-order', type=int, default=3, help='ScanLog rows per order')
+        parser.add_argument('--inventory-logs-per-sample', type=int, default=1, help='InventoryScanLog rows per sample')
+        parser.add_argument('--days', type=int, default=90, help='Spread order creation over this many days')
+        parser.add_argument('--flush', action='store_true', help='Delete previously generated benchmark data first')
+
+    def handle(self, *args, **options):
+        scale = options['scale'].lower()
+        if scale in SCALES:
+            n_orders = SCALES[scale]
+        elif scale.isdigit():
+            n_orders = int(scale)
+        else:
+            raise CommandError(f'Unknown scale {scale!r}')
+
+        self.rng = random.Random(options['seed'])
+
+        if options['flush']:
+            self.flush()
+
+        users = self.create_users()
+        n_products = max(10, n_orders // 100)
+        n_batches = max(10, n_orders // 100)
+
+        products = self.create_products(n_products)
+        self.create_orders(n_orders, products, users, options['days'])
+        self.create_scan_logs(options['scans_per_order'], users)
+        self.create_inventory(n_batches, n_orders, products, users, options['inventory_logs_per_sample'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {n_products} products, {n_orders} orders, {n_batches} batches '
+            f'and their samples and audit logs'
+        ))
+
+    def flush(self):
+        self.stdout.write('Flushing previous benchmark data...')
+        InventoryBatch.objects.filter(batch_id__startswith=PREFIX).delete()
+        Order.objects.filter(barcode__startswith=PREFIX).delete()
+        Product.objects.filter(sku__startswith=PREFIX).delete()
+
+    def create_users(self):
+        users = {}
+        for role, group_name in BENCH_USERS.items():
+            user, created = User.objects.get_or_create(
+                username=bench_username(role),
+                defaults={'is_staff': role == 'admin', 'is_superuser': role == 'admin'},
+            )
+            if created:
+                user.set_unusable_password()
+                user.save()
+            group, _ = Group.objects.get_or_create(name=group_name)
+            user.groups.add(group)
+            users[role] = user
+        return users
+
+    def _bulk_create(self, model, objs_iter, total, label):
+        created = 0
+        chunk = []
+        for obj in objs_iter:
+            chunk.append(obj)
+            if len(chunk) >= CHUNK_SIZE:
+                with transaction.atomic():
+                    model.objects.bulk_create(chunk)
+                created += len(chunk)
+                chunk = []
+                self.stdout.write(f'  {label}: {created}/{total}', ending='\r')
+        if chunk:
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+            created += len(chunk)
+        self.stdout.write(f'  {label}: {created}/{total}')
+
+    def create_products(self, count):
+        start = Product.objects.filter(sku__startswith=PREFIX).count()
+        objs = (
+            Product(
+                name=f'Bench Product {i}',
+                sku=f'{PREFIX}-SKU-{i}',
+                barcode=f'{PREFIX}-PRD-{i}',
+                quantity=self.rng.randint(0, 500),
+            )
+            for i in range(start, start + count)
+        )
+        self._bulk_create(Product, objs, count, 'products')
+        return list(Product.objects.filter(sku__startswith=PREFIX).values_list('id', flat=True))
+
+    def create_orders(self, count, product_ids, users, days):
+        start = Order.objects.filter(barcode__startswith=PREFIX).count()
+        statuses = [value for value, _ in Order.STATUS_CHOICES]
+        creators = [users['admin'].id, users['manager'].id, users['operator'].id, users['warehouse_staff'].id]
+        objs = (
+            Order(
+                customer=f'Customer {self.rng.randint(1, max(100, count // 10))}',
+                product_id=self.rng.choice(product_ids),
+                quantity=self.rng.randint(1, 20),
+                status=self.rng.choice(statuses),
+                barcode=f'{PREFIX}-ORD-{i}',
+                created_by_id=self.rng.choice(creators),
+            )
+            for i in range(start, start + count)
+        )
+        self._bulk_create(Order, objs, count, 'orders')
+
+        # created_at is auto_now_add, so spread the orders over the last
+        # `days` days with one UPDATE per day instead of per-row saves
+        now = timezone.now()
+        bench_orders = Order.objects.filter(barcode__startswith=PREFIX).annotate(day=F('id') % days)
+        for day in range(days):
+            bench_orders.filter(day=day).update(created_at=now - timedelta(days=day))
+
+    def create_scan_logs(self, per_order, users):
+        orders = Order.objects.filter(barcode__startswith=PREFIX, scans__isnull=True).values_list('id', 'barcode', 'created_at')
+        total = orders.count() * per_order
+        actions = ['scan', 'status_change', 'image_upload', 'note_added']
+        statuses = [value for value, _ in Order.STATUS_CHOICES]
+        scanners = [user.id for user in users.values()]
+
+        def objs():
+            for order_id, barcode, created_at in orders.iterator(chunk_size=CHUNK_SIZE):
+                yield ScanLog(
+                    order_id=order_id, barcode_data=barcode, scanned_by_id=self.rng.choice(scanners),
+                    action='order_created', scanned_at=created_at,
+                )
+                for step in range(1, per_order):
+                    action = self.rng.choice(actions)
+                    yield ScanLog(
+                        order_id=order_id,
+                        barcode_data=barcode,
+                        scanned_by_id=self.rng.choice(scanners),
+                        action=action,
+                        scanned_at=created_at + timedelta(hours=step),
+                        details={'new_status': self.rng.choice(statuses)} if action == 'status_change' else None,
+                    )
+
+        self._bulk_create(ScanLog, objs(), total, 'scan logs')
+
+    def create_inventory(self, n_batches, n_samples, product_ids, users, logs_per_sample):
+        start = InventoryBatch.objects.filter(batch_id__startswith=PREFIX).count()
+        batch_statuses = ['pending', 'received', 'verified', 'stored', 'shipped']
+        batch_objs = (
+            InventoryBatch(
+                batch_id=f'{PREFIX}-B{i}',
+                batch_type=self.rng.choice(['incoming', 'outgoing']),
+                product_id=self.rng.choice(product_ids),
+                quantity=max(1, n_samples // n_batches),
+                status=self.rng.choice(batch_statuses),
+                created_by_id=users['manager'].id,
+            )
+            for i in range(start, start + n_batches)
+        )
+        self._bulk_create(InventoryBatch, batch_objs, n_batches, 'batches')
+
+        batches = list(
+            InventoryBatch.objects.filter(batch_id__startswith=PREFIX, samples__isnull=True).values_list('id', 'batch_id')
+        )
+        per_batch = max(1, n_samples // max(1, len(batches)))
+        # Pick orders from the bench id range rather than loading every id;
+        # bulk-created orders are contiguous, so nearly every pick is a bench order
+        order_range = Order.objects.filter(barcode__startswith=PREFIX).aggregate(first=Min('id'), last=Max('id'))
+        sample_statuses = ['in_stock', 'allocated', 'shipped', 'damaged', 'lost']
+
+        def sample_objs():
+            for batch_pk, batch_id in batches:
+                for j in range(per_batch):
+                    status = self.rng.choice(sample_statuses)
+                    yield InventorySample(
+                        batch_id=batch_pk,
+                        sample_number=f'{j:05d}',
+                        # bulk_create skips save(), so set the barcode here
+                        barcode=f'{batch_id}-{j:05d}',
+                        status=status,
+                        order_id=(
+                            self.rng.randint(order_range['first'], order_range['last'])
+                            if status in ('allocated', 'shipped') and order_range['first'] is not None else None
+                        ),
+                    )
+
+        self._bulk_create(InventorySample, sample_objs(), per_batch * len(batches), 'samples')
+
+        samples = InventorySample.objects.filter(
+            batch__batch_id__startswith=PREFIX, audit_logs__isnull=True
+        ).values_list('id', flat=True)
+        actions = [value for value, _ in InventoryScanLog.ACTION_CHOICES]
+        locations = [f'dock {i}' for i in range(1, 9)]
+        conditions = ['good', 'good', 'good', 'dented', 'wet']
+        scanners = [users['warehouse_staff'].id, users['operator'].id]
+
+        def log_objs():
+            now = timezone.now()
+            for sample_id in samples.iterator(chunk_size=CHUNK_SIZE):
+                for _ in range(logs_per_sample):
+                    yield InventoryScanLog(
+                        sample_id=sample_id,
+                        action=self.rng.choice(actions),
+                        scanned_by_id=self.rng.choice(scanners),
+                        details={'location': self.rng.choice(locations), 'condition': self.rng.choice(conditions)},
+                        timestamp=now - timedelta(minutes=self.rng.randint(0, 90 * 24 * 60)),
+                    )
+
+        self._bulk_create(InventoryScanLog, log_objs(), samples.count() * logs_per_sample, 'inventory scan logs')
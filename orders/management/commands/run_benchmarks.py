@@ -0,0 +1,238 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+from itertools import count, cycle
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from orders.models import (
+    Product, Order, ScanLog, ImageAttachment, InventoryBatch, InventorySample, InventoryScanLog,
+)
+
+from .generate_benchmark_data import PREFIX, bench_username
+
+_unique = count()
+
+
+def _sample_order():
+    order = Order.objects.filter(barcode__startswith=PREFIX).order_by('-id').only('id', 'barcode').first()
+    if order is None:
+        raise CommandError('No benchmark data found, run generate_benchmark_data first')
+    return order
+
+
+def _search_term():
+    return Order.objects.filter(barcode__startswith=PREFIX).values_list('customer', flat=True).first()
+
+
+def get_scenarios():
+    """
+    Benchmark scenarios: (name, role, method, url, data factory).
+
+    Each data factory is called per request so write scenarios never collide
+    on unique barcodes.
+    """
+    order = _sample_order()
+    # Scan different orders so the duplicate-scan shortcut never kicks in
+    scan_barcodes = cycle(
+        Order.objects.filter(barcode__startswith=PREFIX).order_by('-id').values_list('barcode', flat=True)[:100]
+    )
+    product_id = Product.objects.filter(sku__startswith=PREFIX).values_list('id', flat=True).first()
+    search = _search_term()
+    yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+
+    def new_order():
+        return {
+            'customer': 'Bench Customer',
+            'product': product_id,
+            'quantity': 1,
+            'barcode': f'{PREFIX}-NEW-{time.time_ns()}-{next(_unique)}',
+        }
+
+    return [
+        ('dashboard', 'manager', 'get', reverse('orders:dashboard'), None),
+        ('dashboard_admin', 'admin', 'get', reverse('orders:dashboard'), None),
+        ('order_list', 'manager', 'get', reverse('orders:order_list'), None),
+        ('order_list_status', 'manager', 'get', reverse('orders:order_list'), lambda: {'status': 'processing'}),
+        ('order_list_search', 'manager', 'get', reverse('orders:order_list'), lambda: {'search': search}),
+        ('order_list_status_search', 'manager', 'get', reverse('orders:order_list'),
+         lambda: {'status': 'new', 'search': search}),
+        ('order_detail', 'manager', 'get', reverse('orders:order_detail', args=[order.id]), None),
+        ('barcode_scan_form', 'warehouse_staff', 'get', reverse('orders:barcode_scan'), None),
+        ('barcode_scan', 'manager', 'post', reverse('orders:barcode_scan'), lambda: {'barcode': next(scan_barcodes)}),
+        ('create_order_form', 'operator', 'get', reverse('orders:create_order'), None),
+        ('create_order', 'operator', 'post', reverse('orders:create_order'), new_order),
+        ('admin_product_changelist', 'admin', 'get', reverse('admin:orders_product_changelist'), None),
+        ('admin_order_changelist', 'admin', 'get', reverse('admin:orders_order_changelist'), None),
+        ('admin_imageattachment_changelist', 'admin', 'get', reverse('admin:orders_imageattachment_changelist'), None),
+        ('admin_scanlog_changelist', 'admin', 'get', reverse('admin:orders_scanlog_changelist'), None),
+        ('admin_scanlog_new_status', 'admin', 'get', reverse('admin:orders_scanlog_changelist'),
+         lambda: {'new_status': 'shipped'}),
+        ('admin_inventoryscanlog_changelist', 'admin', 'get',
+         reverse('admin:orders_inventoryscanlog_changelist'), None),
+        ('admin_inventoryscanlog_location', 'admin', 'get',
+         reverse('admin:orders_inventoryscanlog_changelist'), lambda: {'location': 'dock 3'}),
+        ('audit_search_new_status', 'manager', 'get', reverse('orders:audit_search'),
+         lambda: {'new_status': 'shipped', 'since': yesterday, 'until': yesterday}),
+        ('audit_search_location', 'manager', 'get', reverse('orders:audit_search'),
+         lambda: {'log': 'inventory', 'location': 'dock 3'}),
+        ('audit_search_condition', 'manager', 'get', reverse('orders:audit_search'),
+         lambda: {'log': 'inventory', 'condition': 'wet', 'details.location': 'dock 3'}),
+    ]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Time the POS views and admin changelists and report query counts as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per scenario')
+        parser.add_argument('--only', nargs='*', help='Run only the named scenarios')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--compare', help='Previous JSON report to compare median times and query counts against')
+        parser.add_argument('--label', default='', help='Free-form label stored in the report')
+
+    def handle(self, *args, **options):
+        # Benchmarks fire requests back to back: measure the views, not the
+        # admission layer's rate limits and duplicate-scan replays
+        with override_settings(ADMISSION_RATE=0, ADMISSION_USER_RATE=0, SCAN_DEDUPE_SECONDS=0):
+            self.run(options)
+
+    def run(self, options):
+        host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')), 'localhost')
+        clients = {}
+
+        results = []
+        for name, role, method, url, data_factory in get_scenarios():
+            if options['only'] and name not in options['only']:
+                continue
+
+            client = clients.get(role)
+            if client is None:
+                try:
+                    user = User.objects.get(username=bench_username(role))
+                except User.DoesNotExist:
+                    raise CommandError('Benchmark users missing, run generate_benchmark_data first')
+                client = Client(SERVER_NAME=host, HTTP_X_STATION_ID='benchmark')
+                client.force_login(user)
+                clients[role] = client
+
+            results.append(self.run_scenario(client, name, role, method, url, data_factory, options))
+            self.stderr.write(f"{name:<36} {results[-1]['median_ms']:>9.2f} ms  {results[-1]['queries']:>4} queries")
+            if not results[-1]['ok']:
+                self.stderr.write(self.style.ERROR(f"{name}: unexpected status {results[-1]['statuses']}"))
+
+        report = {
+            'label': options['label'],
+            'git_commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'repeat': options['repeat'],
+            'row_counts': {
+                'products': Product.objects.count(),
+                'orders': Order.objects.count(),
+                'image_attachments': ImageAttachment.objects.count(),
+                'scan_logs': ScanLog.objects.count(),
+                'inventory_batches': InventoryBatch.objects.count(),
+                'inventory_samples': InventorySample.objects.count(),
+                'inventory_scan_logs': InventoryScanLog.objects.count(),
+            },
+            'results': results,
+        }
+
+        if options['compare']:
+            report['comparison'] = self.compare(options['compare'], results)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        failed = [result['name'] for result in results if not result['ok']]
+        if failed:
+            raise CommandError(f"Scenarios returned non-2xx/3xx responses: {', '.join(failed)}")
+
+    def run_scenario(self, client, name, role, method, url, data_factory, options):
+        request = getattr(client, method)
+        for _ in range(options['warmup']):
+            request(url, data_factory() if data_factory else None)
+
+        timings = []
+        query_counts = []
+        statuses = set()
+        for _ in range(max(1, options['repeat'])):
+            data = data_factory() if data_factory else None
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = request(url, data)
+                if getattr(response, 'streaming', False):
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+            timings.append(elapsed * 1000)
+            query_counts.append(len(queries))
+            statuses.add(response.status_code)
+
+        return {
+            'name': name,
+            'role': role,
+            'method': method.upper(),
+            'url': url,
+            'status': max(statuses),
+            'statuses': sorted(statuses),
+            'ok': all(200 <= status < 400 for status in statuses),
+            'queries': max(query_counts),
+            'min_ms': round(min(timings), 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p95_ms': round(_percentile(timings, 95), 3),
+            'max_ms': round(max(timings), 3),
+        }
+
+    def compare(self, path, results):
+        with open(path) as fh:
+            previous = {r['name']: r for r in json.load(fh)['results']}
+
+        comparison = []
+        for result in results:
+            before = previous.get(result['name'])
+            if before is None:
+                continue
+            comparison.append({
+                'name': result['name'],
+                'median_ms_before': before['median_ms'],
+                'median_ms_after': result['median_ms'],
+                'median_change_pct': round(
+                    (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100, 1
+                ) if before['median_ms'] else None,
+                'queries_before': before['queries'],
+                'queries_after': result['queries'],
+            })
+        return comparison
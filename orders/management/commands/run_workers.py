@@ -0,0 +1,127 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from multiprocessing import Process
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+from orders.jobs import DEFAULT_QUEUE, claim_jobs, requeue_stale_jobs, run_job
+from orders.models import Job
+
+
+class Worker:
+    """One worker process: a claim loop feeding a pool of job threads."""
+
+    def __init__(self, queues, threads, poll_interval, stale_after, stdout):
+        self.queues = queues
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.stdout = stdout
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.in_flight = threading.Semaphore(threads)
+        self.last_maintenance = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.stdout.write(f'Worker {self.worker_id} started ({self.threads} threads, queues: {", ".join(self.queues)})')
+
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='job') as pool:
+            while not self.stopping.is_set():
+                self.maintain()
+
+                # Only claim as many jobs as there are idle threads
+                free = 0
+                while self.in_flight.acquire(blocking=False):
+                    free += 1
+                if not free:
+                    if not self.in_flight.acquire(timeout=self.poll_interval):
+                        continue
+                    free = 1
+
+                close_old_connections()
+                jobs = claim_jobs(self.worker_id, self.queues, limit=free)
+                for _ in range(free - len(jobs)):
+                    self.in_flight.release()
+                for job in jobs:
+                    pool.submit(self.execute, job)
+
+                if not jobs:
+                    self.stopping.wait(self.poll_interval)
+
+        self.stdout.write(f'Worker {self.worker_id} stopped')
+
+    def maintain(self):
+        """Heartbeat our running jobs and requeue those of dead workers."""
+        now = time.monotonic()
+        if now - self.last_maintenance < self.stale_after.total_seconds() / 3:
+            return
+        self.last_maintenance = now
+        close_old_connections()
+        Job.objects.filter(status='running', locked_by=self.worker_id).update(locked_at=timezone.now())
+        requeued, failed = requeue_stale_jobs(self.stale_after)
+        if requeued or failed:
+            self.stdout.write(f'Stale jobs: {requeued} requeued, {failed} failed')
+
+    def execute(self, job):
+        try:
+            run_job(job)
+        finally:
+            # Each pool thread has its own connection; don't hold it idle
+            connections.close_all()
+            self.in_flight.release()
+
+
+def _run_worker(queues, threads, poll_interval, stale_after, stdout):
+    Worker(queues, threads, poll_interval, stale_after, stdout).run()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (PostgreSQL SELECT ... FOR UPDATE SKIP LOCKED queue)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to start')
+        parser.add_argument('--threads', type=int, default=4, help='Job threads per process')
+        parser.add_argument('--queues', nargs='+', default=[DEFAULT_QUEUE, 'sync'], help='Queues to consume')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when no job is due')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Requeue running jobs whose worker has not sent a heartbeat for this many seconds')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        worker_args = (
+            options['queues'], options['threads'], options['poll_interval'],
+            timedelta(seconds=options['stale_after']), self.stdout,
+        )
+
+        if options['processes'] <= 1:
+            _run_worker(*worker_args)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        processes = [Process(target=_run_worker, args=worker_args) for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+
+        def forward(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    os.kill(process.pid, signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS('All workers stopped'))
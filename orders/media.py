@@ -0,0 +1,120 @@
+"""
+Responses for permission-checked media files.
+
+Once a view has authorized the request, ``media_response`` hands the file to
+the front web server when MEDIA_ACCEL_MODE is set: ``nginx`` sends an
+X-Accel-Redirect to an internal location (MEDIA_ACCEL_PREFIX) and
+``sendfile`` sends an X-Sendfile path (Apache mod_xsendfile, lighttpd).
+Either way no file bytes pass through Django.  Without a front server the
+file is served by Django itself, with Range and If-Modified-Since support;
+whole-file responses go through the server's wsgi.file_wrapper (sendfile)
+where one is available.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Read-only view of ``length`` bytes of a file starting at ``start``."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single ``bytes=`` range, inclusive; None to send the
+    whole file; raises ValueError if the range can't be satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        # Missing, malformed or multi-range requests get the whole file
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def media_response(request, name):
+    """Response delivering MEDIA_ROOT/``name`` to an already authorized request."""
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404('Invalid media path')
+
+    mode = getattr(settings, 'MEDIA_ACCEL_MODE', '')
+    if mode == 'nginx':
+        response = HttpResponse()
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX.rstrip('/') + '/' + quote(name)
+    elif mode == 'sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = path
+    else:
+        response = _file_response(request, path)
+
+    if response.status_code in (200, 206):
+        response['Content-Type'] = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    # Authorized content: browsers may cache it, shared caches must not
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'MEDIA_CACHE_SECONDS', 3600))
+    return response
+
+
+def _file_response(request, path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404('Media file not found')
+
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    return response
@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import F, Q
+from django.db.models.fields.json import KeyTransform
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
 from django.utils import timezone
 
 
@@ -16,6 +19,10 @@ class Product(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Products'
+        indexes = [
+            # Catalog Last-Modified lookup (max(updated_at))
+            models.Index(fields=['updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.sku})"
@@ -64,6 +71,10 @@ class ImageAttachment(models.Model):
     class Meta:
         ordering = ['-uploaded_at']
         verbose_name_plural = 'Image Attachments'
+        indexes = [
+            # Media requests look attachments up by file path
+            models.Index(fields=['image']),
+        ]
 
     def __str__(self):
         return f"Image for Order {self.order.id} - {self.uploaded_at}"
@@ -83,21 +94,32 @@ class ScanLog(models.Model):
     barcode_data = models.CharField(max_length=255)
     scanned_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
-    scanned_at = models.DateTimeField(auto_now_add=True)
+    # Defaults to now, but synced station events keep their original scan time
+    scanned_at = models.DateTimeField(default=timezone.now)
     details = models.JSONField(blank=True, null=True)
 
+    # Offline station sync (see orders/sync.py)
+    station = models.CharField(max_length=100, blank=True, null=True)
+    idempotency_key = models.CharField(max_length=100, unique=True, blank=True, null=True)
+
     class Meta:
         ordering = ['-scanned_at']
         verbose_name_plural = 'Scan Logs'
         indexes = [
-            models.Index(fields=['order']),
+            # Per-order history in time order (see orders/timeline.py)
+            models.Index(fields=['order', 'scanned_at']),
             models.Index(fields=['action']),
             models.Index(fields=['-scanned_at']),
+            # Hot audit key: "orders moved to <status> in <period>" (see orders/audit.py)
+            models.Index(KeyTransform('new_status', 'details'), F('scanned_at').desc(), name='scanlog_new_status_idx'),
+            # Ad-hoc containment queries on any other details key
+            GinIndex(fields=['details'], opclasses=['jsonb_path_ops'], name='scanlog_details_gin'),
         ]
 
     def __str__(self):
+        return f"Scan {self.id} - Order {self.order.id} - {self.action} ({self.scanned_at})"
+
 
-        
 # Inventory Management Models
 
 class InventoryBatch(models.Model):
@@ -220,17 +242,77 @@ class InventoryScanLog(models.Model):
     action = models.CharField(max_length=30, choices=ACTION_CHOICES)
     scanned_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     details = models.JSONField(blank=True, null=True, help_text="Additional data like location, condition")
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    # Offline station sync (see orders/sync.py)
+    station = models.CharField(max_length=100, blank=True, null=True)
+    idempotency_key = models.CharField(max_length=100, unique=True, blank=True, null=True)
     
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = 'Inventory Scan Logs'
         indexes = [
-            models.Index(fields=['sample']),
+            # Per-sample history in time order (see orders/timeline.py)
+            models.Index(fields=['sample', 'timestamp']),
             models.Index(fields=['action']),
             models.Index(fields=['-timestamp']),
+            # Hot audit key: "samples scanned at <location>" (see orders/audit.py)
+            models.Index(KeyTransform('location', 'details'), F('timestamp').desc(), name='invscanlog_location_idx'),
+            # Ad-hoc containment queries on condition and other details keys
+            GinIndex(fields=['details'], opclasses=['jsonb_path_ops'], name='invscanlog_details_gin'),
         ]
     
     def __str__(self):
         return f"{self.action} - {self.sample.barcode} ({self.timestamp})"
-        return f"Scan {self.id} - Order {self.order.id} - {self.action} ({self.scanned_at})"
+
+
+# Background Jobs
+
+class Job(models.Model):
+    """Background job stored in the database and run by `manage.py run_workers`"""
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Registered task name (see orders/jobs.py)")
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default='default')
+    priority = models.IntegerField(default=0, help_text="Higher priority jobs run first")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+
+    # Retries
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not claimed before this time")
+    last_error = models.TextField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+
+    # Tracking / metrics
+    enqueued_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    locked_by = models.CharField(max_length=100, blank=True, null=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    duration_ms = models.FloatField(blank=True, null=True, help_text="Run time of the last attempt")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Claim query: queued jobs of a queue by priority, then due time
+            models.Index(
+                fields=['queue', '-priority', 'run_at'],
+                name='job_claim_idx',
+                condition=Q(status='queued'),
+            ),
+            models.Index(fields=['status', 'locked_at']),
+            models.Index(fields=['name', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} - {self.name} ({self.status})"
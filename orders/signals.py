@@ -0,0 +1,20 @@
+"""Cache invalidation for rendered order fragments (see orders/cache.py)."""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_orders_version
+from .models import Product, Order, ImageAttachment
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_order_pages(sender, **kwargs):
+    bump_orders_version()
+
+
+@receiver([post_save, post_delete], sender=ImageAttachment)
+def touch_order_on_image_change(sender, instance, **kwargs):
+    # Bump the order's updated_at so its row and detail fragments re-render
+    Order.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
+    bump_orders_version()
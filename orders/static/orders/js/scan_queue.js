@@ -0,0 +1,108 @@
+/*
+ * Offline scan queue for warehouse stations.
+ *
+ * Scans and status changes are stored in localStorage with the time they
+ * happened and a unique idempotency key, then uploaded in batches to
+ * /pos/scan/sync/ whenever the station is online.  Events the server reports
+ * as accepted, duplicate or rejected are removed from the queue; anything
+ * else (network errors, 5xx, 409, 429) stays queued and is retried.
+ *
+ * Usage:
+ *   const queue = new ScanQueue({syncUrl: '/pos/scan/sync/', station: 'dock-3'});
+ *   queue.enqueue('scan', barcode, {details: {location: 'dock-3'}});
+ *   queue.enqueue('status_change', barcode, {status: 'packed'});
+ */
+(function (window) {
+  'use strict';
+
+  function newKey(station) {
+    if (window.crypto && window.crypto.randomUUID) {
+      return window.crypto.randomUUID();
+    }
+    return station + '-' + Date.now() + '-' + Math.random().toString(36).slice(2);
+  }
+
+  function csrfToken() {
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+  }
+
+  function ScanQueue(options) {
+    this.syncUrl = options.syncUrl || '/pos/scan/sync/';
+    this.station = options.station || 'station';
+    this.batchSize = options.batchSize || 1000;
+    this.storageKey = 'distrodog.scanQueue.' + this.station;
+    this.flushing = false;
+
+    const self = this;
+    window.addEventListener('online', function () { self.flush(); });
+    window.setInterval(function () { self.flush(); }, options.retryInterval || 15000);
+  }
+
+  ScanQueue.prototype.load = function () {
+    try {
+      return JSON.parse(window.localStorage.getItem(this.storageKey)) || [];
+    } catch (e) {
+      return [];
+    }
+  };
+
+  ScanQueue.prototype.save = function (events) {
+    window.localStorage.setItem(this.storageKey, JSON.stringify(events));
+  };
+
+  ScanQueue.prototype.size = function () {
+    return this.load().length;
+  };
+
+  ScanQueue.prototype.enqueue = function (type, barcode, extra) {
+    const event = Object.assign({
+      id: newKey(this.station),
+      type: type,
+      barcode: barcode,
+      scanned_at: new Date().toISOString(),
+    }, extra || {});
+    const events = this.load();
+    events.push(event);
+    this.save(events);
+    this.flush();
+    return event;
+  };
+
+  ScanQueue.prototype.flush = async function () {
+    if (this.flushing || !navigator.onLine) {
+      return;
+    }
+    this.flushing = true;
+    try {
+      let events = this.load();
+      while (events.length) {
+        const batch = events.slice(0, this.batchSize);
+        const response = await fetch(this.syncUrl, {
+          method: 'POST',
+          credentials: 'same-origin',
+          // X-Station-ID: the server rate-limits each station (see orders/admission.py)
+          headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken(), 'X-Station-ID': this.station},
+          body: JSON.stringify({station: this.station, events: batch}),
+        });
+        if (!response.ok) {
+          break;
+        }
+        const result = await response.json();
+        const done = new Set(result.results.map(function (r) { return r.id; }));
+        // Re-read in case scans were queued while the upload was in flight
+        events = this.load().filter(function (e) { return !done.has(e.id); });
+        this.save(events);
+        if (!done.size) {
+          break;
+        }
+      }
+    } catch (e) {
+      // Still offline; the next 'online' event or retry tick will flush
+    } finally {
+      this.flushing = false;
+    }
+  };
+
+  window.ScanQueue = ScanQueue;
+})(window);
@@ -0,0 +1,288 @@
+"""
+Batched sync for scan events queued offline by warehouse stations.
+
+Stations keep scans and status changes in a local queue while the Wi-Fi is
+down, each event carrying the client scan time and an idempotency key.  When
+the connection comes back the queue is uploaded in batches and applied here
+in a single transaction.  Replayed events (same idempotency key) are reported
+as duplicates instead of being written twice.
+"""
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Order, ScanLog, InventorySample, InventoryScanLog
+from .cache import bump_orders_version
+from .events import publish_order_event
+
+EVENT_TYPES = ('scan', 'status_change')
+
+# Keeps IN (...) lists and INSERT batches at a sane size for 10k-event uploads
+CHUNK_SIZE = 1000
+
+
+class SyncError(ValueError):
+    """Raised when a sync batch is malformed as a whole."""
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _clean_event(raw):
+    """Validate a single event, returning (event, error)."""
+    if not isinstance(raw, dict):
+        return None, 'Event must be an object'
+
+    key = raw.get('id')
+    if not isinstance(key, str) or not key or len(key) > 100:
+        return None, 'Missing or invalid idempotency key'
+
+    event_type = raw.get('type')
+    if event_type not in EVENT_TYPES:
+        return {'id': key}, f'Unknown event type {event_type!r}'
+
+    barcode = raw.get('barcode')
+    if not isinstance(barcode, str) or not barcode.strip():
+        return {'id': key}, 'Missing barcode'
+
+    try:
+        # Out-of-range dates raise ValueError, non-strings (epoch numbers) TypeError
+        scanned_at = parse_datetime(raw.get('scanned_at') or '')
+    except (ValueError, TypeError):
+        scanned_at = None
+    if scanned_at is None:
+        return {'id': key}, 'Missing or invalid scanned_at'
+    if timezone.is_naive(scanned_at):
+        scanned_at = timezone.make_aware(scanned_at, dt_timezone.utc)
+
+    status = raw.get('status')
+    if event_type == 'status_change' and (not isinstance(status, str) or status not in dict(Order.STATUS_CHOICES)):
+        return {'id': key}, f'Invalid status {status!r}'
+
+    details = raw.get('details')
+    if details is not None and not isinstance(details, dict):
+        return {'id': key}, 'details must be an object'
+
+    return {
+        'id': key,
+        'type': event_type,
+        'barcode': barcode.strip(),
+        'scanned_at': scanned_at,
+        'status': status,
+        'details': details,
+    }, None
+
+
+def parse_batch(payload):
+    """Validate the envelope of an uploaded batch and return (station, events)."""
+    if not isinstance(payload, dict):
+        raise SyncError('Batch must be a JSON object')
+
+    station = payload.get('station') or None
+    if station is not None and (not isinstance(station, str) or len(station) > 100):
+        raise SyncError('Invalid station identifier')
+
+    events = payload.get('events')
+    if not isinstance(events, list):
+        raise SyncError('Batch must contain an events list')
+
+    max_events = getattr(settings, 'SCAN_SYNC_MAX_EVENTS', 10000)
+    if len(events) > max_events:
+        raise SyncError(f'Batch exceeds {max_events} events')
+
+    return station, events
+
+
+def _existing_keys(keys):
+    """Idempotency keys that were already applied by an earlier upload."""
+    existing = set()
+    for chunk in _chunks(keys):
+        existing.update(
+            ScanLog.objects.filter(idempotency_key__in=chunk).values_list('idempotency_key', flat=True)
+        )
+        existing.update(
+            InventoryScanLog.objects.filter(idempotency_key__in=chunk).values_list('idempotency_key', flat=True)
+        )
+    return existing
+
+
+def _status_changed_at(orders):
+    """
+    Time each order's status was last set, keyed by order id.
+
+    That is its latest status_change scan (online or synced), or its creation
+    if it has none.  Offline events scanned before it must not overwrite it.
+    """
+    changed_at = {order.id: order.created_at for order in orders}
+    for chunk in _chunks(changed_at):
+        latest = (
+            ScanLog.objects.filter(order_id__in=chunk, action='status_change')
+            .values('order_id').annotate(last=Max('scanned_at'))
+        )
+        for row in latest:
+            changed_at[row['order_id']] = max(changed_at[row['order_id']], row['last'])
+    return changed_at
+
+
+def apply_batch(user, user_role, station, raw_events):
+    """
+    Apply a batch of offline events in one transaction.
+
+    Every event gets a result entry (accepted, duplicate or rejected) so the
+    station can drop it from its queue.  The batch is resolved with a fixed
+    number of queries per chunk of events rather than per event: existing
+    keys, orders and samples are loaded with IN lookups, status changes are
+    written with one bulk_update and audit rows with bulk_create.
+
+    A status change scanned before the order's current status was set (e.g.
+    online, while the station was offline) is kept in the audit log but not
+    applied.
+    """
+    results = {}
+    events = []
+    seen = set()
+    # Repeats of a key within this batch share the first copy's result entry
+    repeated = 0
+
+    for raw in raw_events:
+        event, error = _clean_event(raw)
+        if error:
+            if event is not None:
+                results[event['id']] = {'id': event['id'], 'status': 'rejected', 'error': error}
+            continue
+        if event['id'] in seen:
+            repeated += 1
+            continue
+        seen.add(event['id'])
+        events.append(event)
+
+    with transaction.atomic():
+        existing = _existing_keys(e['id'] for e in events)
+        pending = []
+        for event in events:
+            if event['id'] in existing:
+                results[event['id']] = {'id': event['id'], 'status': 'duplicate'}
+            else:
+                pending.append(event)
+
+        barcodes = {e['barcode'] for e in pending}
+        orders = {}
+        for chunk in _chunks(barcodes):
+            for order in Order.objects.filter(barcode__in=chunk).only('id', 'barcode', 'status', 'created_by_id', 'created_at'):
+                orders[order.barcode] = order
+
+        samples = {}
+        sample_barcodes = [b for b in barcodes if b not in orders]
+        for chunk in _chunks(sample_barcodes):
+            for sample in InventorySample.objects.filter(barcode__in=chunk).only('id', 'barcode'):
+                samples[sample.barcode] = sample
+
+        status_changed_at = _status_changed_at(
+            orders[e['barcode']] for e in pending
+            if e['type'] == 'status_change' and e['barcode'] in orders
+        )
+
+        scan_logs = []
+        inventory_logs = []
+        changed_orders = {}
+        old_statuses = {}
+
+        # Replay in the order the events happened on the floor, so the last
+        # status change scanned wins even if the queue was uploaded out of
+        # order or after newer changes made online
+        for event in sorted(pending, key=lambda e: e['scanned_at']):
+            key = event['id']
+            order = orders.get(event['barcode'])
+
+            if order is not None and user_role == 'warehouse_staff' and order.created_by_id != user.id:
+                results[key] = {'id': key, 'status': 'rejected', 'error': 'You can only scan orders you created.'}
+                continue
+
+            if event['type'] == 'status_change':
+                if user_role not in ('admin', 'manager'):
+                    results[key] = {'id': key, 'status': 'rejected', 'error': 'Not allowed to change order status'}
+                    continue
+                if order is None:
+                    results[key] = {'id': key, 'status': 'rejected', 'error': f"Order with barcode {event['barcode']} not found"}
+                    continue
+                details = dict(event['details'] or {})
+                details['new_status'] = event['status']
+                superseded = event['scanned_at'] < status_changed_at[order.id]
+                if superseded:
+                    details['superseded'] = True
+                else:
+                    old_statuses.setdefault(order.id, order.status)
+                    order.status = event['status']
+                    changed_orders[order.id] = order
+                scan_logs.append(ScanLog(
+                    order=order,
+                    barcode_data=order.barcode,
+                    scanned_by=user,
+                    action='status_change',
+                    scanned_at=event['scanned_at'],
+                    details=details,
+                    station=station,
+                    idempotency_key=key,
+                ))
+                if superseded:
+                    results[key] = {'id': key, 'status': 'accepted', 'superseded': True}
+                    continue
+            elif order is not None:
+                scan_logs.append(ScanLog(
+                    order=order,
+                    barcode_data=order.barcode,
+                    scanned_by=user,
+                    action='scan',
+                    scanned_at=event['scanned_at'],
+                    details=event['details'],
+                    station=station,
+                    idempotency_key=key,
+                ))
+            elif event['barcode'] in samples:
+                inventory_logs.append(InventoryScanLog(
+                    sample=samples[event['barcode']],
+                    action='sample_scan',
+                    scanned_by=user,
+                    timestamp=event['scanned_at'],
+                    details=event['details'],
+                    station=station,
+                    idempotency_key=key,
+                ))
+            else:
+                results[key] = {'id': key, 'status': 'rejected', 'error': f"Barcode {event['barcode']} not found"}
+                continue
+
+            results[key] = {'id': key, 'status': 'accepted'}
+
+        if changed_orders:
+            # bulk_update bypasses auto_now, so stamp updated_at explicitly
+            now = timezone.now()
+            for order in changed_orders.values():
+                order.updated_at = now
+            Order.objects.bulk_update(changed_orders.values(), ['status', 'updated_at'], batch_size=CHUNK_SIZE)
+            # bulk_update sends no post_save, so invalidate cached pages here
+            transaction.on_commit(bump_orders_version)
+            for chunk in _chunks(changed_orders):
+                for order in Order.objects.filter(id__in=chunk).select_related('product', 'created_by'):
+                    publish_order_event(order, 'status_changed', old_statuses[order.id])
+        ScanLog.objects.bulk_create(scan_logs, batch_size=CHUNK_SIZE)
+        InventoryScanLog.objects.bulk_create(inventory_logs, batch_size=CHUNK_SIZE)
+
+    counts = {'accepted': 0, 'duplicate': 0, 'rejected': 0}
+    for result in results.values():
+        counts[result['status']] += 1
+
+    return {
+        'station': station,
+        'accepted': counts['accepted'],
+        'duplicates': counts['duplicate'] + repeated,
+        'rejected': counts['rejected'],
+        'results': list(results.values()),
+    }
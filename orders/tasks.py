@@ -0,0 +1,23 @@
+"""
+Background tasks for the orders app, run by `manage.py run_workers`.
+
+Order creation and status changes stay inline.  Their audit row is a single
+INSERT in the same transaction as the order, so deferring it would cost a
+Job INSERT of the same size and open a window in which the order exists
+without its audit entry.  Their board event is one NOTIFY sent after commit,
+which a worker could only deliver later.  Work that scales with its input,
+like large offline scan batches, is what belongs here.
+"""
+from django.contrib.auth.models import User
+
+from .jobs import task
+from .sync import apply_batch
+
+
+@task(name='orders.apply_scan_batch', queue='sync', priority=10)
+def apply_scan_batch(user_id, station, events):
+    """Apply an offline scan batch that was uploaded with "async": true."""
+    from .views import get_user_role
+
+    user = User.objects.get(id=user_id)
+    return apply_batch(user, get_user_role(user), station, events)
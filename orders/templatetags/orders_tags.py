@@ -0,0 +1,18 @@
+from django import template
+
+register = template.Library()
+
+STATUS_BADGES = {
+    'new': 'badge-info',
+    'processing': 'badge-warning',
+    'packed': 'badge-warning',
+    'shipped': 'badge-secondary',
+    'delivered': 'badge-success',
+    'cancelled': 'badge-danger',
+}
+
+
+@register.filter
+def status_badge(status):
+    """CSS badge class for an order status (replaces the per-row if chain)."""
+    return STATUS_BADGES.get(status, 'badge-info')
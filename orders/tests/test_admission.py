@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from orders.admission import acquire_write_slot, admission_metrics, release_write_slot
+
+
+@override_settings(ADMISSION_MAX_CONCURRENT_WRITES=2)
+class WriteSlotTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_limit_holds_after_slots_expire_under_running_requests(self):
+        first, second = acquire_write_slot(), acquire_write_slot()
+        self.assertIsNone(acquire_write_slot())
+
+        # Both slots outlive WRITE_SLOT_TTL and are taken by new requests
+        cache.delete_many([first[0], second[0]])
+        third, fourth = acquire_write_slot(), acquire_write_slot()
+        # The original requests finish late: they must not free the new slots
+        release_write_slot(first)
+        release_write_slot(second)
+
+        self.assertIsNone(acquire_write_slot())
+        self.assertEqual(admission_metrics()['writes_in_flight'], 2)
+
+        release_write_slot(third)
+        self.assertIsNotNone(acquire_write_slot())
+        release_write_slot(fourth)
+        self.assertEqual(admission_metrics()['writes_in_flight'], 1)
+
+    @override_settings(ADMISSION_MAX_CONCURRENT_WRITES=0)
+    def test_disabled_limit_always_admits(self):
+        slot = acquire_write_slot()
+        self.assertIsNotNone(slot)
+        release_write_slot(slot)
+        self.assertEqual(admission_metrics()['writes_in_flight'], 0)
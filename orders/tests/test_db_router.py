@@ -0,0 +1,116 @@
+"""
+Read replica routing (distrodog/db_router.py).
+
+These tests need at least one replica alias.  Pointing DB_REPLICA_HOSTS at
+the primary itself is enough, since test replicas mirror the default test
+database:
+
+    python manage.py makemigrations orders
+    DB_REPLICA_HOSTS=localhost python manage.py test orders
+"""
+import time
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from distrodog import db_router
+from distrodog.db_router import PRIMARY, ReplicaRoutingMiddleware
+from orders.cache import bump_orders_version, version_is_settled
+from orders.models import Order
+
+REPLICAS = [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def read_alias_view(request):
+    """Report the alias the router picks for a read during this request."""
+    if request.method == 'POST':
+        request.session['touched'] = True
+    return HttpResponse(Order.objects.all().db)
+
+
+@skipUnless(REPLICAS, 'needs a replica database (set DB_REPLICA_HOSTS)')
+@override_settings(REPLICA_MAX_LAG_SECONDS=5, REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method, view=read_alias_view, cookies=None):
+        request = getattr(self.factory, method)('/')
+        request.COOKIES.update(cookies or {})
+        handler = SessionMiddleware(ReplicaRoutingMiddleware(view))
+        response = handler(request)
+        return response, response.content.decode()
+
+    def test_get_reads_from_replica(self):
+        _, alias = self.request('get')
+        self.assertIn(alias, REPLICAS)
+
+    def test_post_uses_primary_and_pins_session(self):
+        response, alias = self.request('post')
+        self.assertEqual(alias, PRIMARY)
+
+        session_cookie = response.cookies[settings.SESSION_COOKIE_NAME].value
+        _, alias = self.request('get', cookies={settings.SESSION_COOKIE_NAME: session_cookie})
+        self.assertEqual(alias, PRIMARY)
+
+    def test_pin_expires(self):
+        response, _ = self.request('post')
+        session_cookie = response.cookies[settings.SESSION_COOKIE_NAME].value
+
+        with mock.patch('distrodog.db_router.time.time', return_value=db_router.time.time() + 60):
+            _, alias = self.request('get', cookies={settings.SESSION_COOKIE_NAME: session_cookie})
+        self.assertIn(alias, REPLICAS)
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        with mock.patch('distrodog.db_router._measure_lag', return_value=60.0):
+            _, alias = self.request('get')
+        self.assertEqual(alias, PRIMARY)
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        with mock.patch('distrodog.db_router._measure_lag', side_effect=db_router.DatabaseError):
+            _, alias = self.request('get')
+        self.assertEqual(alias, PRIMARY)
+
+    def test_version_is_settled_once_bump_is_older_than_replica_lag(self):
+        view = lambda request: HttpResponse(str(version_is_settled()))
+        bump_orders_version()
+
+        with mock.patch('distrodog.db_router._measure_lag', return_value=2.0):
+            self.assertEqual(self.request('get', view=view)[1], 'False')
+            self.assertEqual(self.request('post', view=view)[1], 'True')
+            # Measured lag plus REPLICA_LAG_CHECK_INTERVAL
+            with mock.patch('orders.cache.time.time', return_value=time.time() + 8):
+                self.assertEqual(self.request('get', view=view)[1], 'True')
+
+
+@skipUnless(REPLICAS, 'needs a replica database (set DB_REPLICA_HOSTS)')
+@override_settings(REPLICA_MAX_LAG_SECONDS=5, REPLICA_LAG_CHECK_INTERVAL=5)
+class ReplicaVersionedPageTests(TransactionTestCase):
+    # Views load the session user from the replica, which only sees committed rows
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user('manager', password='pw')
+        user.groups.add(Group.objects.create(name='managers'))
+        self.client.force_login(user)
+
+    def test_order_list_is_not_validated_before_replica_catches_up(self):
+        bump_orders_version()
+
+        response = self.client.get(reverse('orders:order_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+        with mock.patch('orders.cache.time.time', return_value=time.time() + 60):
+            response = self.client.get(reverse('orders:order_list'))
+        self.assertTrue(response.has_header('ETag'))
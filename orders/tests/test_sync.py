@@ -0,0 +1,82 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from orders.models import Order, Product, ScanLog
+
+
+class SyncScansTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('manager', password='pw')
+        self.user.groups.add(Group.objects.create(name='managers'))
+        product = Product.objects.create(name='Widget', sku='W-1', barcode='PRD-1')
+        self.order = Order.objects.create(
+            customer='ACME', product=product, quantity=1, barcode='ORD-1', created_by=self.user,
+        )
+        self.client.force_login(self.user)
+
+    def sync(self, events):
+        return self.client.post(
+            reverse('orders:sync_scans'),
+            json.dumps({'station': 'dock-1', 'events': events}),
+            content_type='application/json',
+        )
+
+    def test_malformed_event_is_rejected_without_failing_batch(self):
+        good = {'id': 'good', 'type': 'scan', 'barcode': 'ORD-1', 'scanned_at': '2025-01-09T10:00:00Z'}
+        bad_events = [
+            {'id': 'bad-date', 'type': 'scan', 'barcode': 'ORD-1', 'scanned_at': '2025-13-45T00:00:00'},
+            {'id': 'bad-epoch', 'type': 'scan', 'barcode': 'ORD-1', 'scanned_at': 1736416800000},
+            {'id': 'bad-status', 'type': 'status_change', 'barcode': 'ORD-1',
+             'scanned_at': '2025-01-09T10:00:00Z', 'status': ['shipped']},
+        ]
+
+        for bad in bad_events:
+            with self.subTest(event=bad['id']):
+                response = self.sync([bad, {**good, 'id': f"good-{bad['id']}"}])
+
+                self.assertEqual(response.status_code, 200)
+                results = {r['id']: r for r in response.json()['results']}
+                self.assertEqual(results[bad['id']]['status'], 'rejected')
+                self.assertEqual(results[f"good-{bad['id']}"]['status'], 'accepted')
+
+        self.assertEqual(ScanLog.objects.filter(order=self.order).count(), len(bad_events))
+
+    def test_status_change_older_than_current_status_is_logged_not_applied(self):
+        self.client.post(reverse('orders:update_order_status', args=[self.order.id]), {'status': 'processing'})
+        scanned_at = (timezone.now() - timedelta(hours=1)).isoformat()
+
+        response = self.sync([{
+            'id': 'stale', 'type': 'status_change', 'barcode': 'ORD-1',
+            'status': 'shipped', 'scanned_at': scanned_at,
+        }])
+
+        self.assertEqual(response.json()['results'], [{'id': 'stale', 'status': 'accepted', 'superseded': True}])
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'processing')
+        self.assertTrue(ScanLog.objects.get(idempotency_key='stale').details['superseded'])
+
+    def test_newer_status_change_is_applied(self):
+        self.client.post(reverse('orders:update_order_status', args=[self.order.id]), {'status': 'processing'})
+        scanned_at = (timezone.now() + timedelta(minutes=1)).isoformat()
+
+        self.sync([{
+            'id': 'fresh', 'type': 'status_change', 'barcode': 'ORD-1',
+            'status': 'shipped', 'scanned_at': scanned_at,
+        }])
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'shipped')
+
+    def test_repeated_event_in_batch_counts_as_duplicate(self):
+        event = {'id': 'twice', 'type': 'scan', 'barcode': 'ORD-1', 'scanned_at': '2025-01-09T10:00:00Z'}
+
+        body = self.sync([event, dict(event)]).json()
+
+        self.assertEqual((body['accepted'], body['duplicates']), (1, 1))
+        self.assertEqual(body['results'], [{'id': 'twice', 'status': 'accepted'}])
+        self.assertEqual(ScanLog.objects.filter(idempotency_key='twice').count(), 1)
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import Group, User
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from orders.models import Order, Product
+
+
+class OrderDetailConditionalTests(TransactionTestCase):
+    # GETs may be served by a replica (see distrodog/db_router.py), which
+    # only sees committed rows
+    databases = '__all__'
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', password='pw')
+        self.staff = User.objects.create_user('staff', password='pw')
+        group = Group.objects.create(name='warehouse_staff')
+        self.owner.groups.add(group)
+        self.staff.groups.add(group)
+        product = Product.objects.create(name='Widget', sku='W-1', barcode='PRD-1')
+        self.order = Order.objects.create(
+            customer='ACME', product=product, quantity=1, barcode='ORD-1', created_by=self.owner,
+        )
+        self.url = reverse('orders:order_detail', args=[self.order.id])
+
+    def test_owner_gets_etag_and_304(self):
+        self.client.force_login(self.owner)
+
+        etag = self.client.get(self.url)['ETag']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_forbidden_order_has_no_validator(self):
+        self.client.force_login(self.owner)
+        owner_etag = self.client.get(self.url)['ETag']
+        self.client.force_login(self.staff)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('ETag'))
+
+        for etag in (owner_etag, '*'):
+            with self.subTest(etag=etag):
+                self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 403)
@@ -0,0 +1,181 @@
+"""
+Chain-of-custody timeline for an order, sample or batch barcode.
+
+The barcode is resolved to its subject, and the timeline covers the orders,
+samples and batches linked to it: an order's allocated samples and their
+batches, a sample's batch and order, or a batch's samples and their orders.
+Events are merged oldest first from ScanLog, InventoryScanLog and batch
+status milestones.
+
+Each source is read with one keyset-paged query ordered by its
+(owner, time) index and the sorted streams are merged in Python, so a page
+costs the same handful of queries however long the history is.
+"""
+import heapq
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .audit import AuditQueryError, decode_cursor, encode_cursor
+from .models import Order, ScanLog, InventoryBatch, InventorySample, InventoryScanLog
+
+# Tie-break order for events at the same instant
+SOURCES = ['batch', 'inventory', 'scan']
+SOURCE_RANK = {name: rank for rank, name in enumerate(SOURCES)}
+
+# Milestones derived from an InventoryBatch row: (sub key, action, time field)
+BATCH_MILESTONES = [
+    (0, 'batch_created', 'created_at'),
+    (1, 'batch_received', 'received_at'),
+    (2, 'batch_status', 'updated_at'),
+]
+
+
+def parse_cursor(value):
+    """Decode a timeline cursor (encoded ``<iso time>|<source>|<id>|<sub>``) into a sort key."""
+    if not value:
+        return None
+    try:
+        moment, source, pk, sub = decode_cursor(value).split('|')
+        key = (parse_datetime(moment), SOURCE_RANK[source], int(pk), int(sub))
+    except (ValueError, KeyError):
+        raise AuditQueryError('Invalid cursor')
+    if key[0] is None:
+        raise AuditQueryError('Invalid cursor')
+    return key
+
+
+def make_cursor(key):
+    moment, rank, pk, sub = key
+    return encode_cursor(f'{moment.isoformat()}|{SOURCES[rank]}|{pk}|{sub}')
+
+
+def resolve_barcode(barcode):
+    """Return (subject type, object) for an order, sample or batch barcode, or (None, None)."""
+    order = Order.objects.filter(barcode=barcode).first()
+    if order:
+        return 'order', order
+    sample = InventorySample.objects.filter(barcode=barcode).first()
+    if sample:
+        return 'sample', sample
+    batch = InventoryBatch.objects.filter(batch_id=barcode).first()
+    if batch:
+        return 'batch', batch
+    return None, None
+
+
+def custody_scope(subject_type, subject):
+    """
+    Order, sample and batch ids (lists or subqueries) whose events make up the timeline.
+
+    Related ids are left as subqueries so a batch with thousands of samples
+    doesn't need its ids fetched first.
+    """
+    if subject_type == 'order':
+        samples = InventorySample.objects.filter(order=subject)
+        return [subject.id], samples.values('id'), samples.values('batch_id')
+    if subject_type == 'sample':
+        order_ids = [subject.order_id] if subject.order_id else []
+        return order_ids, [subject.id], [subject.batch_id]
+    samples = InventorySample.objects.filter(batch=subject)
+    return samples.filter(order__isnull=False).values('order_id'), samples.values('id'), [subject.id]
+
+
+def _after(time_field, source, after):
+    """Keyset filter for rows of ``source`` that sort after the cursor key."""
+    moment, rank, pk, _ = after
+    own_rank = SOURCE_RANK[source]
+    if own_rank > rank:
+        return Q(**{f'{time_field}__gte': moment})
+    if own_rank < rank:
+        return Q(**{f'{time_field}__gt': moment})
+    return Q(**{f'{time_field}__gt': moment}) | Q(**{time_field: moment, 'id__gt': pk})
+
+
+def _scan_events(order_ids, after, limit):
+    logs = ScanLog.objects.filter(order_id__in=order_ids).select_related('scanned_by')
+    if after:
+        logs = logs.filter(_after('scanned_at', 'scan', after))
+    for log in logs.order_by('scanned_at', 'id')[:limit]:
+        yield (log.scanned_at, SOURCE_RANK['scan'], log.id, 0), {
+            'source': 'scan',
+            'action': log.action,
+            'barcode': log.barcode_data,
+            'order_id': log.order_id,
+            'actor': log.scanned_by.username if log.scanned_by else None,
+            'station': log.station,
+            'details': log.details,
+        }
+
+
+def _inventory_events(sample_ids, after, limit):
+    logs = InventoryScanLog.objects.filter(sample_id__in=sample_ids).select_related('sample', 'scanned_by')
+    if after:
+        logs = logs.filter(_after('timestamp', 'inventory', after))
+    for log in logs.order_by('timestamp', 'id')[:limit]:
+        yield (log.timestamp, SOURCE_RANK['inventory'], log.id, 0), {
+            'source': 'inventory',
+            'action': log.action,
+            'barcode': log.sample.barcode,
+            'sample_id': log.sample_id,
+            'actor': log.scanned_by.username if log.scanned_by else None,
+            'station': log.station,
+            'details': log.details,
+        }
+
+
+def _batch_events(batch_ids, after):
+    # Batches keep no status history, only their timestamps and current
+    # status, so there are at most three events per batch; they are sorted
+    # here rather than in SQL
+    events = []
+    for batch in InventoryBatch.objects.filter(id__in=batch_ids).select_related('created_by'):
+        for sub, action, field in BATCH_MILESTONES:
+            moment = getattr(batch, field)
+            if moment is None or (sub == 2 and batch.status == 'pending'):
+                continue
+            key = (moment, SOURCE_RANK['batch'], batch.id, sub)
+            if after and key <= after:
+                continue
+            events.append((key, {
+                'source': 'batch',
+                'action': action,
+                'barcode': batch.batch_id,
+                'batch_id': batch.id,
+                'actor': batch.created_by.username if batch.created_by and sub == 0 else None,
+                'station': None,
+                'details': {'status': batch.status} if sub == 2 else None,
+            }))
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+def build_timeline(subject_type, subject, limit, after=None):
+    """
+    One page of the subject's custody events, oldest first.
+
+    Returns (events, next cursor or None).  Each source is asked for at most
+    ``limit + 1`` rows past the cursor, which is all a merged page can use.
+    """
+    order_ids, sample_ids, batch_ids = custody_scope(subject_type, subject)
+    streams = [
+        _batch_events(batch_ids, after),
+        _inventory_events(sample_ids, after, limit + 1),
+        _scan_events(order_ids, after, limit + 1),
+    ]
+
+    events = []
+    next_cursor = None
+    for key, event in heapq.merge(*streams, key=lambda item: item[0]):
+        if len(events) == limit:
+            next_cursor = make_cursor(last_key)
+            break
+        event['time'] = key[0].isoformat()
+        events.append(event)
+        last_key = key
+    return events, next_cursor
+
+
+def subject_summary(subject_type, subject):
+    barcode = subject.batch_id if subject_type == 'batch' else subject.barcode
+    return {'type': subject_type, 'id': subject.id, 'barcode': barcode, 'status': subject.status}
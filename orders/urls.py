@@ -9,5 +9,14 @@ urlpatterns = [
     path('orders/create/', views.create_order, name='create_order'),
     path('orders/<int:pk>/', views.order_detail, name='order_detail'),
     path('orders/<int:pk>/update-status/', views.update_order_status, name='update_order_status'),
+    path('products/', views.product_list, name='product_list'),
+    path('board/', views.order_board, name='order_board'),
+    path('board/stream/', views.order_board_stream, name='order_board_stream'),
     path('scan/', views.barcode_scan, name='barcode_scan'),
+    path('scan/sync/', views.sync_scans, name='sync_scans'),
+    path('audit/search/', views.audit_search, name='audit_search'),
+    path('audit/timeline/', views.custody_timeline, name='custody_timeline'),
+    path('jobs/<int:pk>/', views.job_status, name='job_status'),
+    path('jobs/metrics/', views.job_metrics, name='job_metrics'),
+    path('admission/metrics/', views.admission_metrics, name='admission_metrics'),
 ]
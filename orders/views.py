@@ -1,14 +1,31 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.models import Group
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import Http404, JsonResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.views import View
+from django.core.handlers.asgi import ASGIRequest
 from django.utils.decorators import method_decorator
-from django.db.models import Q
+from django.db import IntegrityError
+from django.db.models import Q, Count, Max, Sum
+from django.conf import settings
+from django.core.cache import cache
 from datetime import date, datetime
+import asyncio
+import hashlib
+import time
 import json
+from asgiref.sync import sync_to_async
 from .models import Product, Order, ImageAttachment, ScanLog
+from .cache import get_orders_version, version_is_settled, version_is_shared
+from .events import broadcaster, publish_order_event
+from .sync import SyncError, parse_batch, apply_batch
+from . import audit, timeline
+from .media import media_response
+from .admission import admission_control, admission_metrics as get_admission_metrics
+from .jobs import job_metrics as get_job_metrics
+from .models import Job
+from .tasks import apply_scan_batch
 
 # Role-based access control helper function
 def get_user_role(user):
@@ -52,42 +69,128 @@ def role_required(*allowed_roles):
 def dashboard(request):
     """Main POS dashboard with role-based content."""
     user_role = get_user_role(request.user)
+    today = date.today()
+    orders_version = get_orders_version()
     orders_today = Order.objects.filter(
-        created_at__date=date.today()
-    ).order_by('-created_at')
+        created_at__date=today
+    ).select_related('product', 'created_by').order_by('-created_at')
     
-    stats = {
-        'total_orders': Order.objects.count(),
-        'orders_today': orders_today.count(),
-        'pending_orders': Order.objects.filter(
-            status__in=['new', 'processing']
-        ).count(),
-        'products': Product.objects.count(),
-    }
+    def get_stats():
+        return {
+            'total_orders': Order.objects.count(),
+            'orders_today': orders_today.count(),
+            'pending_orders': Order.objects.filter(
+                status__in=['new', 'processing']
+            ).count(),
+            'products': Product.objects.count(),
+            'total_revenue': Order.objects.aggregate(total=Sum('quantity'))['total'] or 0,
+            'total_users': Order.objects.values('created_by').distinct().count(),
+        }
+    
+    # Stats only change with the orders version, so every screen shares them
+    page_cache_timeout = _page_cache_timeout(request)
+    stats_key = f'dashboard:stats:{orders_version}:{today}'
+    stats = cache.get(stats_key)
+    if stats is None:
+        stats = get_stats()
+        if page_cache_timeout:
+            cache.set(stats_key, stats, page_cache_timeout)
     
     # Role-based context modifications
     context = {
+        # Lazy: only evaluated when the cached orders table misses
         'orders': orders_today[:20],
         'stats': stats,
         'user_role': user_role,
+        'orders_version': orders_version,
+        'today': today,
+        'row_cache_timeout': settings.ORDER_ROW_CACHE_TIMEOUT,
+        'page_cache_timeout': page_cache_timeout,
     }
     
     # Add role-specific data
     if user_role in ['admin', 'manager']:
-        context['total_revenue'] = sum(o.quantity for o in Order.objects.all())
+        context['total_revenue'] = stats['total_revenue']
         context['pending_count'] = stats['pending_orders']
     
     if user_role == 'admin':
-        context['total_users'] = Order.objects.values('created_by').distinct().count()
+        context['total_users'] = stats['total_users']
     
     return render(request, 'orders/dashboard.html', context)
 
+# Conditional GET: validators are computed from a cached version counter or
+# one indexed lookup, so unchanged pages answer 304 without running the view.
+# Rendered pages depend on the viewer (role, CSRF token), so the session is
+# part of every ETag.
+def _etag(request, *parts):
+    key = ':'.join(str(part) for part in (request.session.session_key, *parts))
+    return hashlib.md5(key.encode()).hexdigest()
+
+def _version_is_settled(request):
+    # Checked by both the ETag and the view, so look it up once per request
+    if not hasattr(request, '_version_is_settled'):
+        request._version_is_settled = version_is_settled()
+    return request._version_is_settled
+
+def _page_cache_timeout(request):
+    # Row fragments are keyed on the rows they render, so they are safe to
+    # fill from any replica; version-keyed ones only once the replica has
+    # caught up with the last bump (a timeout of 0 reads but never stores)
+    return settings.ORDER_PAGE_CACHE_TIMEOUT if _version_is_settled(request) else 0
+
+def order_list_etag(request):
+    if not _version_is_settled(request):
+        return None
+    version = get_orders_version()
+    if not version_is_shared():
+        # Other processes' writes never reach a local counter: expire the
+        # ETag as the page fragment does
+        version = f'{version}:{int(time.time() // max(1, settings.ORDER_PAGE_CACHE_TIMEOUT))}'
+    return _etag(request, 'order_list', version, request.GET.urlencode())
+
+def _order_detail_validators(request, pk):
+    # One query for the order's and its product's updated_at and its latest
+    # scan id; synced scans don't touch updated_at, so all are needed
+    if not hasattr(request, '_order_validators'):
+        request._order_validators = (
+            Order.objects.filter(id=pk).annotate(last_scan_id=Max('scans__id'))
+            .values_list('updated_at', 'last_scan_id', 'product__updated_at', 'created_by_id').first()
+        )
+    return request._order_validators
+
+def order_detail_etag(request, pk):
+    validators = _order_detail_validators(request, pk)
+    if validators is None:
+        return None
+    updated_at, last_scan_id, product_updated_at, created_by_id = validators
+    # No validator for orders the viewer may not see, or the 403 would
+    # carry an ETag that reveals when the order changes
+    if get_user_role(request.user) == 'warehouse_staff' and created_by_id != request.user.id:
+        return None
+    return _etag(request, 'order_detail', pk, updated_at.isoformat(), last_scan_id, product_updated_at.isoformat())
+
+def _product_validators(request):
+    # Count catches deletions, which don't move max(updated_at)
+    if not hasattr(request, '_product_validators'):
+        request._product_validators = Product.objects.aggregate(
+            last_modified=Max('updated_at'), count=Count('id')
+        )
+    return request._product_validators
+
+def product_list_etag(request):
+    validators = _product_validators(request)
+    return _etag(request, 'product_list', validators['last_modified'], validators['count'])
+
+def product_list_last_modified(request):
+    return _product_validators(request)['last_modified']
+
 @login_required
 @role_required('admin', 'manager', 'operator')
+@condition(etag_func=order_list_etag)
 def order_list(request):
     """List all orders with filters."""
     user_role = get_user_role(request.user)
-    orders = Order.objects.all().order_by('-created_at')
+    orders = Order.objects.select_related('product', 'created_by').order_by('-created_at')
     
     # Warehouse staff can only see their own orders
     if user_role == 'warehouse_staff':
@@ -106,12 +209,25 @@ def order_list(request):
         )
     
     return render(request, 'orders/order_list.html', {
+        # Lazy: only evaluated when the cached page fragment misses
         'orders': orders[:100],
         'selected_status': status,
+        'search': search,
         'user_role': user_role,
+        'orders_version': get_orders_version(),
+        'row_cache_timeout': settings.ORDER_ROW_CACHE_TIMEOUT,
+        'page_cache_timeout': _page_cache_timeout(request),
     })
 
 @login_required
+@condition(etag_func=product_list_etag, last_modified_func=product_list_last_modified)
+def product_list(request):
+    """JSON product catalog for scanner tablets."""
+    products = Product.objects.order_by('name').values('id', 'name', 'sku', 'barcode', 'quantity', 'updated_at')
+    return JsonResponse({'products': list(products)})
+
+@login_required
+@admission_control()
 @role_required('admin', 'manager', 'operator')
 def create_order(request):
     """Create new order (POS entry)."""
@@ -151,29 +267,51 @@ def handle_create_order(request):
         scanned_by=request.user,
         action='order_created',
     )
+    publish_order_event(order, 'created')
     
-    return redirect('order_detail', pk=order.id)
+    return redirect('orders:order_detail', pk=order.id)
 
 @login_required
+@condition(etag_func=order_detail_etag)
 def order_detail(request, pk):
     """View order details."""
     user_role = get_user_role(request.user)
-    order = get_object_or_404(Order, id=pk)
+    order = get_object_or_404(Order.objects.select_related('product', 'created_by'), id=pk)
     
     # Warehouse staff can only view their own orders
-    if user_role == 'warehouse_staff' and order.created_by != request.user:
+    if user_role == 'warehouse_staff' and order.created_by_id != request.user.id:
         return HttpResponseForbidden("You don't have permission to view this order.")
     
     images = order.images.all()
-    scans = order.scans.all().order_by('-scanned_at')
+    scans = order.scans.select_related('scanned_by').order_by('-scanned_at')
     
     return render(request, 'orders/order_detail.html', {
         'order': order,
         'images': images,
         'scans': scans,
+        # Scans synced from stations don't touch updated_at, so the latest
+        # scan id is part of the fragment cache key
+        'last_scan_id': _order_detail_validators(request, pk)[1],
         'user_role': user_role,
+        'row_cache_timeout': settings.ORDER_ROW_CACHE_TIMEOUT,
     })
 
+@login_required
+def order_image(request, path):
+    """Serve an order image under MEDIA_URL to users who may view its order."""
+    attachment = (
+        ImageAttachment.objects.filter(image=path)
+        .select_related('order').only('image', 'order__created_by').first()
+    )
+    if attachment is None:
+        raise Http404('No such image')
+
+    # Same rule as order_detail: warehouse staff only see their own orders
+    if get_user_role(request.user) == 'warehouse_staff' and attachment.order.created_by_id != request.user.id:
+        return HttpResponseForbidden("You don't have permission to view this image.")
+
+    return media_response(request, attachment.image.name)
+
 @login_required
 @require_http_methods(["POST"])
 @role_required('admin', 'manager')
@@ -183,6 +321,7 @@ def update_order_status(request, pk):
     new_status = request.POST.get('status')
     
     if new_status in dict(Order.STATUS_CHOICES):
+        old_status = order.status
         order.status = new_status
         order.save()
         
@@ -193,10 +332,12 @@ def update_order_status(request, pk):
             action='status_change',
             details={'new_status': new_status}
         )
+        publish_order_event(order, 'status_changed', old_status)
     
-    return redirect('order_detail', pk=order.id)
+    return redirect('orders:order_detail', pk=order.id)
 
 @login_required
+@admission_control(dedupe_field='barcode')
 @role_required('admin', 'manager', 'operator', 'warehouse_staff')
 def barcode_scan(request):
     """Handle barcode scan entry."""
@@ -215,7 +356,7 @@ def barcode_scan(request):
                     'user_role': user_role,
                 })
             
-            return redirect('order_detail', pk=order.id)
+            return redirect('orders:order_detail', pk=order.id)
         except Order.DoesNotExist:
             return render(request, 'orders/barcode_scan.html', {
                 'error': f'Order with barcode {barcode} not found',
@@ -225,3 +366,213 @@ def barcode_scan(request):
     return render(request, 'orders/barcode_scan.html', {
         'user_role': get_user_role(request.user),
     })
+
+@login_required
+def order_board(request):
+    """Live order board: renders today's orders once, then patches them from the event stream."""
+    user_role = get_user_role(request.user)
+    orders_today = Order.objects.filter(
+        created_at__date=date.today()
+    ).select_related('product', 'created_by').order_by('-created_at')
+
+    # Warehouse staff only follow their own orders
+    if user_role == 'warehouse_staff':
+        orders_today = orders_today.filter(created_by=request.user)
+
+    stats = {
+        'total_orders': Order.objects.count(),
+        'orders_today': orders_today.count(),
+        'pending_orders': Order.objects.filter(
+            status__in=['new', 'processing']
+        ).count(),
+    }
+
+    return render(request, 'orders/order_board.html', {
+        'orders': orders_today[:50],
+        'stats': stats,
+        'user_role': user_role,
+    })
+
+async def order_board_stream(request):
+    """Server-Sent Events stream of order changes for the live board (serve via ASGI)."""
+    def get_viewer():
+        if not request.user.is_authenticated:
+            return None, None
+        return request.user.id, get_user_role(request.user)
+
+    # Under WSGI the endless stream would be buffered into a list, holding a
+    # worker thread forever without ever sending an event
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'The order board stream requires an ASGI server (see README)'}, status=503)
+
+    user_id, user_role = await sync_to_async(get_viewer)()
+    if user_id is None:
+        return HttpResponseForbidden("You must be logged in to follow the order board.")
+
+    async def events():
+        queue = broadcaster.subscribe()
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                if user_role == 'warehouse_staff' and event.get('created_by_id') not in (None, user_id):
+                    continue
+                yield f"event: order\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@login_required
+@require_http_methods(["POST"])
+@admission_control()
+@role_required('admin', 'manager', 'operator', 'warehouse_staff')
+def sync_scans(request):
+    """Apply a batch of scans queued offline by a warehouse station."""
+    try:
+        payload = json.loads(request.body)
+        station, events = parse_batch(payload)
+    except (ValueError, SyncError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    # Large uploads can be applied by a background worker instead
+    if payload.get('async'):
+        job = apply_scan_batch.delay(request.user.id, station, events, enqueued_by=request.user)
+        return JsonResponse({'job_id': job.id, 'status': job.status}, status=202)
+
+    try:
+        result = apply_batch(request.user, get_user_role(request.user), station, events)
+    except IntegrityError:
+        # A concurrent upload of the same events won the race; retrying
+        # will report them as duplicates.
+        return JsonResponse({'error': 'Conflicting upload, please retry'}, status=409)
+
+    return JsonResponse(result)
+
+@login_required
+@role_required('admin', 'manager')
+def audit_search(request):
+    """
+    JSON search over audit log details.
+
+    ?log=scan (default) filters ScanLog by new_status, order barcode and action;
+    ?log=inventory filters InventoryScanLog by location, condition, sample
+    barcode and action.  Both accept since/until (date or datetime), any
+    details.<key>=<value> pair, limit and the next_cursor of a previous page.
+    """
+    params = request.GET
+    log_type = params.get('log', 'scan')
+    details = {
+        key[len('details.'):]: value
+        for key, value in params.items()
+        if key.startswith('details.')
+    }
+
+    try:
+        limit = max(1, min(int(params.get('limit', 100)), audit.MAX_RESULTS))
+        filters = {
+            'action': params.get('action'),
+            'since': audit.parse_bound(params.get('since')),
+            'until': audit.parse_bound(params.get('until'), end=True),
+            'details': details or None,
+            'before': audit.parse_cursor(params.get('cursor')),
+        }
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    if log_type == 'scan':
+        logs = audit.search_scan_logs(
+            new_status=params.get('new_status'), order_barcode=params.get('barcode'), **filters
+        )
+        serialize, time_field = audit.serialize_scan_log, 'scanned_at'
+    elif log_type == 'inventory':
+        logs = audit.search_inventory_logs(
+            location=params.get('location'), condition=params.get('condition'),
+            sample_barcode=params.get('barcode'), **filters
+        )
+        serialize, time_field = audit.serialize_inventory_log, 'timestamp'
+    else:
+        return JsonResponse({'error': f'Unknown log type {log_type!r}'}, status=400)
+
+    rows = list(logs[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = audit.make_cursor(getattr(rows[-1], time_field), rows[-1].id)
+
+    return JsonResponse({
+        'log': log_type,
+        'count': len(rows),
+        'results': [serialize(log) for log in rows],
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+@role_required('admin', 'manager')
+def custody_timeline(request):
+    """
+    JSON chain-of-custody timeline for an order, sample or batch barcode.
+
+    Merges order scans, inventory scans and batch milestones oldest first;
+    pass next_cursor back as cursor for the following page.
+    """
+    barcode = request.GET.get('barcode', '').strip()
+    if not barcode:
+        return JsonResponse({'error': 'barcode is required'}, status=400)
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 100)), audit.MAX_RESULTS))
+        after = timeline.parse_cursor(request.GET.get('cursor'))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    subject_type, subject = timeline.resolve_barcode(barcode)
+    if subject is None:
+        return JsonResponse({'error': f'No order, sample or batch with barcode {barcode}'}, status=404)
+
+    events, next_cursor = timeline.build_timeline(subject_type, subject, limit, after)
+    return JsonResponse({
+        'subject': timeline.subject_summary(subject_type, subject),
+        'count': len(events),
+        'results': events,
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def job_status(request, pk):
+    """Status and result of a background job (its owner, managers and admins)."""
+    job = get_object_or_404(Job, id=pk)
+    if job.enqueued_by_id != request.user.id and get_user_role(request.user) not in ('admin', 'manager'):
+        return HttpResponseForbidden("You don't have permission to view this job.")
+
+    return JsonResponse({
+        'id': job.id,
+        'name': job.name,
+        'status': job.status,
+        'attempts': job.attempts,
+        'run_at': job.run_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'duration_ms': job.duration_ms,
+        'result': job.result,
+        'error': job.last_error.strip().splitlines()[-1] if job.last_error else None,
+    })
+
+@login_required
+@role_required('admin')
+def job_metrics(request):
+    """Background job metrics: per-task counts, retries, run time and queue backlog."""
+    return JsonResponse(get_job_metrics())
+
+@login_required
+@role_required('admin', 'manager')
+def admission_metrics(request):
+    """Admission control rejections per station and current write concurrency."""
+    return JsonResponse(get_admission_metrics())